@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analitik Portofolio untuk Toko Kredit Syariah
+Kredit dan pembayaran dimuat sekali ke array kolom, lalu dihitung per kolom:
+aging piutang, setoran harapan vs aktual per hari, dan sebaran hari tertunggak.
+Memakai NumPy jika tersedia, jika tidak Python murni (hasil sama).
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+# NumPy opsional (tidak selalu ada di build Android)
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+
+# Kelompok aging berdasarkan hari tertunggak: (label, minimal hari)
+AGING_BUCKETS = [
+    ('Lancar', 0),
+    ('1-7 hari', 1),
+    ('8-30 hari', 8),
+    ('31-90 hari', 31),
+    ('> 90 hari', 91),
+]
+
+# Histogram hari tertunggak: 0..CAP-1 per hari, bin terakhir >= CAP
+DAYS_BEHIND_CAP = 30
+
+DEFAULT_WINDOW_DAYS = 30
+
+
+def _ordinal_sql(column):
+    """Ekspresi SQL: kolom DATE -> date.toordinal() tanpa parsing di Python"""
+    return f'CAST(julianday({column}) - 1721424.5 AS INTEGER)'
+
+
+class PortfolioColumns:
+    """Kolom kredit dan pembayaran (satu kali baca dari database).
+
+    Kolom kredit (satu nilai per kredit): active, total_price, daily_amount,
+    total_days, start, paid_days, paid_amount. Kolom pembayaran: payment_day,
+    payment_amount (total setoran per hari dalam jendela laporan). Tanggal
+    berupa ordinal.
+    """
+
+    CREDIT_COLUMNS = ('active', 'total_price', 'daily_amount', 'total_days',
+                      'start', 'paid_days', 'paid_amount')
+
+    def __init__(self, credit_rows, payment_rows, holidays):
+        credit_columns = list(zip(*credit_rows)) or [()] * len(self.CREDIT_COLUMNS)
+        for name, values in zip(self.CREDIT_COLUMNS, credit_columns):
+            setattr(self, name, values)
+
+        payment_columns = list(zip(*payment_rows)) or [(), ()]
+        self.payment_day, self.payment_amount = payment_columns
+        self.holidays = holidays
+
+    @classmethod
+    def load(cls, db_manager, window_start, window_end):
+        """Baca semua kredit (dengan ringkasan) dan setoran harian dalam jendela"""
+        cursor = db_manager.connections.cursor()
+
+        cursor.execute(f'''
+            SELECT c.status = 'active', c.total_price, c.daily_amount, c.total_days,
+                   {_ordinal_sql('c.start_date')},
+                   COALESCE(s.total_days_paid, 0), COALESCE(s.total_amount_paid, 0)
+            FROM credits c
+            LEFT JOIN payment_summaries s ON s.credit_id = c.id
+        ''')
+        credit_rows = cursor.fetchall()
+
+        # Dijumlah per hari di SQLite lewat covering index
+        # idx_payments_date_amount, bukan memuat setiap baris pembayaran
+        cursor.execute(f'''
+            SELECT {_ordinal_sql('payment_date')}, SUM(amount)
+            FROM payments
+            WHERE payment_date BETWEEN ? AND ?
+            GROUP BY payment_date
+        ''', (str(window_start), str(window_end)))
+        payment_rows = cursor.fetchall()
+
+        return cls(credit_rows, payment_rows, db_manager.holiday_calendar().ordinals)
+
+    def __len__(self):
+        return len(self.active)
+
+
+def portfolio_report(db_manager, as_of=None, window_days=DEFAULT_WINDOW_DAYS, use_numpy=None):
+    """Laporan portofolio per tanggal `as_of` (default hari ini).
+
+    Return dict:
+        'summary'     - total piutang/lunas/terbayar dan jumlah kredit
+        'aging'       - piutang aktif per kelompok hari tertunggak
+        'inflow'      - setoran harapan vs aktual per hari, `window_days`
+                        hari terakhir sampai `as_of`
+        'days_behind' - sebaran hari tertunggak kredit aktif
+
+    Hari tertunggak = hari kerja (bukan libur) sejak mulai kredit sampai
+    kemarin, dikurangi hari yang sudah dibayar.
+    """
+    if as_of is None:
+        as_of = date.today()
+    window_start = as_of - timedelta(days=window_days - 1)
+
+    columns = PortfolioColumns.load(db_manager, window_start, as_of)
+    return compute_report(columns, as_of, window_days, use_numpy)
+
+
+def compute_report(columns, as_of, window_days=DEFAULT_WINDOW_DAYS, use_numpy=None):
+    """Hitung laporan dari PortfolioColumns yang sudah dimuat"""
+    if use_numpy is None:
+        use_numpy = NUMPY_AVAILABLE
+    compute = _compute_numpy if use_numpy else _compute_python
+    report = compute(columns, as_of.toordinal(), window_days)
+
+    window_start = as_of - timedelta(days=window_days - 1)
+    inflow = report['inflow']
+    inflow['dates'] = [window_start + timedelta(days=i) for i in range(window_days)]
+    inflow['total_expected'] = round(sum(inflow['expected']), 2)
+    inflow['total_actual'] = round(sum(inflow['actual']), 2)
+    inflow['collection_rate'] = (
+        inflow['total_actual'] / inflow['total_expected'] if inflow['total_expected'] else None
+    )
+
+    report['as_of'] = as_of
+    report['engine'] = 'numpy' if use_numpy else 'python'
+    return report
+
+
+def _percentile(sorted_values, q):
+    """Persentil dengan interpolasi linear (sama seperti numpy.percentile)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def _build_report(summary, aging_counts, aging_amounts, behind_hist, behind_stats,
+                  expected, actual):
+    """Susun dict laporan dari hasil hitung (nilai Python biasa)"""
+    return {
+        'summary': summary,
+        'aging': [
+            {'label': label, 'count': int(count), 'outstanding': round(float(amount), 2)}
+            for (label, _), count, amount in zip(AGING_BUCKETS, aging_counts, aging_amounts)
+        ],
+        'inflow': {
+            'expected': [round(float(value), 2) for value in expected],
+            'actual': [round(float(value), 2) for value in actual],
+        },
+        'days_behind': dict(behind_stats, histogram=[int(count) for count in behind_hist]),
+    }
+
+
+def _compute_numpy(columns, today, window_days):
+    active = np.asarray(columns.active, dtype=bool)
+    total_price = np.asarray(columns.total_price, dtype=np.float64)
+    daily = np.asarray(columns.daily_amount, dtype=np.float64)
+    total_days = np.asarray(columns.total_days, dtype=np.int64)
+    start = np.asarray(columns.start, dtype=np.int64)
+    paid_days = np.asarray(columns.paid_days, dtype=np.int64)
+    paid_amount = np.asarray(columns.paid_amount, dtype=np.float64)
+    holidays = np.asarray(columns.holidays, dtype=np.int64)
+
+    # Hari kerja yang sudah lewat sejak mulai, tidak termasuk hari ini
+    holidays_before_start = np.searchsorted(holidays, start, side='left')
+    elapsed = (today - start) - (np.searchsorted(holidays, today, side='left') - holidays_before_start)
+    expected_days = np.clip(elapsed, 0, total_days)
+
+    remaining_days = np.maximum(total_days - paid_days, 0)
+    outstanding = (remaining_days * daily)[active]
+    behind = np.maximum(expected_days - paid_days, 0)[active]
+
+    bucket_mins = np.array([minimum for _, minimum in AGING_BUCKETS])
+    bucket = np.searchsorted(bucket_mins, behind, side='right') - 1
+    aging_counts = np.bincount(bucket, minlength=len(AGING_BUCKETS))
+    aging_amounts = np.bincount(bucket, weights=outstanding, minlength=len(AGING_BUCKETS))
+
+    behind_hist = np.bincount(np.minimum(behind, DAYS_BEHIND_CAP), minlength=DAYS_BEHIND_CAP + 1)
+    if behind.size:
+        behind_stats = {
+            'mean': float(behind.mean()),
+            'median': float(np.percentile(behind, 50)),
+            'p90': float(np.percentile(behind, 90)),
+            'max': int(behind.max()),
+        }
+    else:
+        behind_stats = {'mean': 0.0, 'median': 0.0, 'p90': 0.0, 'max': 0}
+
+    # Jatuh tempo efektif semua kredit sekaligus (lihat HolidayCalendar.due_date)
+    base = start + total_days
+    due = base
+    while True:
+        shifted = base + np.searchsorted(holidays, due, side='right') - holidays_before_start
+        if np.array_equal(shifted, due):
+            break
+        due = shifted
+
+    # Setoran harapan: cicilan harian setiap hari kerja di [mulai, jatuh tempo)
+    window_start = today - window_days + 1
+    low = np.clip(start, window_start, today + 1) - window_start
+    high = np.clip(due, window_start, today + 1) - window_start
+    diff = np.zeros(window_days + 1)
+    np.add.at(diff, low, daily)
+    np.add.at(diff, high, -daily)
+    expected = np.cumsum(diff[:window_days])
+    in_window = holidays[(holidays >= window_start) & (holidays <= today)]
+    expected[in_window - window_start] = 0
+
+    payment_day = np.asarray(columns.payment_day, dtype=np.int64) - window_start
+    actual = np.bincount(
+        payment_day, weights=np.asarray(columns.payment_amount, dtype=np.float64),
+        minlength=window_days
+    )[:window_days]
+
+    summary = {
+        'total_piutang': round(float(outstanding.sum()), 2),
+        'total_lunas': round(float(total_price[~active].sum()), 2),
+        'total_terbayar': round(float(paid_amount.sum()), 2),
+        'active_count': int(active.sum()),
+        'completed_count': int((~active).sum()),
+    }
+
+    return _build_report(summary, aging_counts, aging_amounts, behind_hist, behind_stats,
+                         expected, actual)
+
+
+def _compute_python(columns, today, window_days):
+    holidays = columns.holidays
+    bucket_mins = [minimum for _, minimum in AGING_BUCKETS]
+    holidays_before_today = bisect_left(holidays, today)
+
+    window_start = today - window_days + 1
+    diff = [0.0] * (window_days + 1)
+
+    aging_counts = [0] * len(AGING_BUCKETS)
+    aging_amounts = [0.0] * len(AGING_BUCKETS)
+    behind_values = []
+    total_piutang = 0.0
+    total_lunas = 0.0
+    active_count = 0
+
+    for active, total_price, daily, total_days, start, paid_days, _ in zip(
+            columns.active, columns.total_price, columns.daily_amount, columns.total_days,
+            columns.start, columns.paid_days, columns.paid_amount):
+        holidays_before_start = bisect_left(holidays, start)
+
+        if active:
+            elapsed = (today - start) - (holidays_before_today - holidays_before_start)
+            expected_days = min(max(elapsed, 0), total_days)
+            outstanding = max(total_days - paid_days, 0) * daily
+            behind = max(expected_days - paid_days, 0)
+
+            bucket = bisect_right(bucket_mins, behind) - 1
+            aging_counts[bucket] += 1
+            aging_amounts[bucket] += outstanding
+            behind_values.append(behind)
+            total_piutang += outstanding
+            active_count += 1
+        else:
+            total_lunas += total_price
+
+        # Jatuh tempo efektif (lihat HolidayCalendar.due_date)
+        base = start + total_days
+        due = base
+        while True:
+            shifted = base + bisect_right(holidays, due) - holidays_before_start
+            if shifted == due:
+                break
+            due = shifted
+
+        low = min(max(start, window_start), today + 1) - window_start
+        high = min(max(due, window_start), today + 1) - window_start
+        if low < high:
+            diff[low] += daily
+            diff[high] -= daily
+
+    expected = []
+    running = 0.0
+    for value in diff[:window_days]:
+        running += value
+        expected.append(running)
+    for holiday in holidays[bisect_left(holidays, window_start):bisect_right(holidays, today)]:
+        expected[holiday - window_start] = 0.0
+
+    actual = [0.0] * window_days
+    for day, amount in zip(columns.payment_day, columns.payment_amount):
+        actual[day - window_start] += amount
+
+    behind_hist = [0] * (DAYS_BEHIND_CAP + 1)
+    for behind in behind_values:
+        behind_hist[min(behind, DAYS_BEHIND_CAP)] += 1
+
+    behind_values.sort()
+    behind_stats = {
+        'mean': sum(behind_values) / len(behind_values) if behind_values else 0.0,
+        'median': float(_percentile(behind_values, 50)),
+        'p90': float(_percentile(behind_values, 90)),
+        'max': behind_values[-1] if behind_values else 0,
+    }
+
+    summary = {
+        'total_piutang': round(total_piutang, 2),
+        'total_lunas': round(total_lunas, 2),
+        'total_terbayar': round(sum(columns.paid_amount), 2),
+        'active_count': active_count,
+        'completed_count': len(columns) - active_count,
+    }
+
+    return _build_report(summary, aging_counts, aging_amounts, behind_hist, behind_stats,
+                         expected, actual)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Akses Database Asinkron untuk Toko Kredit Syariah
+Query SQLite dan dekripsi Fernet dijalankan di satu worker thread agar
+main thread Kivy tidak macet; hasil dikirim balik lewat Clock.schedule_once
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Facade asinkron di atas DatabaseManager.
+
+    Semua pekerjaan berjalan berurutan di satu worker thread (koneksi
+    SQLite per thread dari ConnectionManager), jadi urutan tulis sama
+    dengan urutan pemanggilan. Setiap method DatabaseManager bisa dipanggil
+    langsung dan mengembalikan Future:
+
+        app.db_async.get_today_collections(callback=self.show_list)
+
+    callback(result) / error_callback(exception) dipanggil di main thread.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-worker')
+
+    def submit(self, func, *args, callback=None, error_callback=None, **kwargs):
+        """Jalankan func(*args, **kwargs) di worker thread; return Future"""
+        future = self._executor.submit(func, *args, **kwargs)
+        if callback is not None or error_callback is not None:
+            future.add_done_callback(
+                lambda f: self._deliver(f, callback, error_callback)
+            )
+        return future
+
+    def __getattr__(self, name):
+        method = getattr(self.db_manager, name)
+        if not callable(method):
+            return method
+
+        def call(*args, callback=None, error_callback=None, **kwargs):
+            return self.submit(method, *args, callback=callback,
+                               error_callback=error_callback, **kwargs)
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    def _deliver(self, future, callback, error_callback):
+        """Jadwalkan callback di main thread (dipanggil di worker thread)"""
+        # Import di sini agar modul ini tetap bisa dipakai tanpa Kivy
+        from kivy.clock import Clock
+
+        def run(dt):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                if callback is not None:
+                    callback(future.result())
+            elif error_callback is not None:
+                error_callback(error)
+            else:
+                print(f"Database worker error: {str(error)}")
+
+        Clock.schedule_once(run, 0)
+
+    def shutdown(self, wait=True):
+        """Hentikan worker; wait=True menunggu tulisan yang masih antre"""
+        self._executor.shutdown(wait=wait)
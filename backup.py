@@ -17,10 +17,11 @@ from typing import Dict, List, Optional, Any
 from pathlib import Path
 
 # Encryption
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import base64
+from cryptography.fernet import Fernet, InvalidToken
+from key_service import get_key_service
+from database import (
+    SEARCH_INDEX_TABLE, SEARCH_INDEX_REBUILD_SQL, REBUILD_SUMMARIES_SQL, RESET_END_DATES_SQL
+)
 
 # Check if running on Android
 try:
@@ -59,9 +60,10 @@ class BackupManager:
     
     SCOPES = ['https://www.googleapis.com/auth/drive.file']
     
-    def __init__(self, db_path, password):
+    def __init__(self, db_path, password, db_manager=None):
         self.db_path = db_path
         self.password = password
+        self.db_manager = db_manager
         self.backup_folder = os.path.join(os.path.expanduser('~'), 'KreditBackup')
         self.struk_folder = os.path.join(self.backup_folder, 'Struk')
         
@@ -85,24 +87,34 @@ class BackupManager:
     def _setup_encryption(self):
         """Setup encryption for backups"""
         try:
-            # Generate key from password
-            password_bytes = self.password.encode()
-            salt = b'kredit_syariah_salt_2025'  # Fixed salt for consistency
-            
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-            )
-            
-            key = base64.urlsafe_b64encode(kdf.derive(password_bytes))
+            # Backup key is derived from the session's cached master key (HKDF),
+            # so no second PBKDF2 run is needed at startup
+            key = get_key_service().backup_key(self.password)
             return Fernet(key)
             
         except Exception as e:
             print(f"Encryption setup failed: {str(e)}")
             return None
     
+    def _decrypt_backup(self, encrypted_data):
+        """Decrypt backup, falling back to the legacy PBKDF2 key for old backups"""
+        try:
+            return self.fernet.decrypt(encrypted_data)
+        except InvalidToken:
+            legacy_key = get_key_service().legacy_backup_key(self.password)
+            return Fernet(legacy_key).decrypt(encrypted_data)
+    
+    def _connect(self):
+        """Get database connection (reuses the per-thread connection of db_manager if available)"""
+        if self.db_manager:
+            return self.db_manager.connections.connection()
+        return sqlite3.connect(self.db_path)
+    
+    def _release(self, conn):
+        """Close connection unless it is owned by db_manager"""
+        if not self.db_manager:
+            conn.close()
+    
     def setup_google_drive(self, credentials_file=None):
         """Setup Google Drive API"""
         if not GOOGLE_DRIVE_AVAILABLE:
@@ -172,6 +184,10 @@ class BackupManager:
             # Clean old backups (keep last 10)
             self._cleanup_old_backups()
             
+            # Keep the WAL file small (runs on the backup thread, not the UI)
+            if self.db_manager:
+                self.db_manager.checkpoint()
+            
             self.last_backup_time = datetime.now()
             
             print(f"Backup created: {backup_filename}")
@@ -190,9 +206,9 @@ class BackupManager:
         }
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connect()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
             
             # Get all table names
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -201,7 +217,7 @@ class BackupManager:
             # Backup each table
             for table in tables:
                 table_name = table['name']
-                if table_name.startswith('sqlite_'):
+                if table_name.startswith('sqlite_') or self._is_search_index(table_name):
                     continue
                 
                 cursor.execute(f"SELECT * FROM {table_name}")
@@ -210,7 +226,7 @@ class BackupManager:
                 # Convert rows to dictionaries
                 backup_data['tables'][table_name] = [dict(row) for row in rows]
             
-            conn.close()
+            self._release(conn)
             return backup_data
             
         except Exception as e:
@@ -226,7 +242,7 @@ class BackupManager:
             
             # Decrypt backup
             if self.fernet:
-                decrypted_data = self.fernet.decrypt(encrypted_data)
+                decrypted_data = self._decrypt_backup(encrypted_data)
                 backup_data = json.loads(decrypted_data.decode())
             else:
                 backup_data = json.loads(encrypted_data.decode())
@@ -243,22 +259,27 @@ class BackupManager:
     
     def _restore_to_database(self, backup_data):
         """Restore backup data to database"""
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            if not conn.in_transaction:
+                # Reads before it writes: take the write lock up front so a WAL
+                # snapshot cannot go stale (SQLITE_BUSY_SNAPSHOT)
+                cursor.execute("BEGIN IMMEDIATE")
             
             # Clear existing data
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
+            tables = [table['name'] for table in cursor.fetchall()]
             
-            for table in tables:
-                table_name = table['name']
-                if not table_name.startswith('sqlite_'):
+            for table_name in tables:
+                if not table_name.startswith('sqlite_') and not self._is_search_index(table_name):
                     cursor.execute(f"DELETE FROM {table_name}")
             
             # Restore data
             for table_name, rows in backup_data['tables'].items():
-                if not rows:
+                if not rows or self._is_search_index(table_name):
                     continue
                 
                 # Get column names
@@ -270,13 +291,34 @@ class BackupManager:
                     values = [row[col] for col in columns]
                     cursor.execute(f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})", values)
             
+            # Recompute derived data in the same transaction (with or without
+            # db_manager): payment summaries, base due dates, search index
+            if 'payment_summaries' in tables:
+                for sql in REBUILD_SUMMARIES_SQL:
+                    cursor.execute(sql)
+            cursor.execute(RESET_END_DATES_SQL)
+            if SEARCH_INDEX_TABLE in tables:
+                cursor.execute(SEARCH_INDEX_REBUILD_SQL)
+            
             conn.commit()
-            conn.close()
+            self._release(conn)
+            
+            # Drop caches only after commit, so readers on other threads
+            # reload the restored data instead of the old snapshot
+            if self.db_manager:
+                self.db_manager.data_reloaded('restore')
             
         except Exception as e:
             print(f"Database restore failed: {str(e)}")
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
             raise
     
+    @staticmethod
+    def _is_search_index(table_name):
+        """FTS index tables are derived from customers and rebuilt on restore"""
+        return table_name == SEARCH_INDEX_TABLE or table_name.startswith(SEARCH_INDEX_TABLE + '_')
+    
     def _upload_to_drive(self, file_path, filename):
         """Upload backup to Google Drive"""
         try:
@@ -463,18 +505,18 @@ class BackupManager:
 backup_manager = None
 
 
-def get_backup_manager(db_path=None, password=None):
+def get_backup_manager(db_path=None, password=None, db_manager=None):
     """Get global backup manager instance"""
     global backup_manager
     
     if backup_manager is None and db_path and password:
-        backup_manager = BackupManager(db_path, password)
+        backup_manager = BackupManager(db_path, password, db_manager)
     
     return backup_manager
 
 
-def initialize_backup(db_path, password):
+def initialize_backup(db_path, password, db_manager=None):
     """Initialize backup manager"""
     global backup_manager
-    backup_manager = BackupManager(db_path, password)
+    backup_manager = BackupManager(db_path, password, db_manager)
     return backup_manager
\ No newline at end of file
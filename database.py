@@ -9,40 +9,506 @@ import sqlite3
 import os
 import json
 import hashlib
+import threading
+from difflib import SequenceMatcher
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import base64
+
+from holiday_calendar import HolidayCalendar, to_date
+from stats_service import DashboardStats
+from events import (
+    EventBus, CustomerAdded, CreditAdded, PaymentPosted, HolidayMarked, DataReloaded
+)
+from key_service import (
+    get_key_service, make_key_check, verify_key_check, InvalidPasswordError
+)
+
+# Jatuh tempo dasar tanpa hari libur; jatuh tempo efektif dihitung saat dibaca
+# dari kalender libur (lihat DatabaseManager.due_date)
+RESET_END_DATES_SQL = '''
+    UPDATE credits
+    SET end_date = date(start_date, '+' || total_days || ' days')
+'''
+
+# Migrasi skema berurutan: (versi, langkah). Versi terakhir yang sudah
+# dijalankan disimpan di PRAGMA user_version file database, sehingga
+# perangkat lama cukup menjalankan langkah yang belum pernah dijalankan.
+# Langkah berupa SQL atau callable(db_manager, cursor).
+SCHEMA_MIGRATIONS = [
+    (1, [
+        # Indeks covering untuk agregat pembayaran per kredit & cek bayar hari ini
+        '''CREATE INDEX IF NOT EXISTS idx_payments_credit_date
+           ON payments (credit_id, payment_date, days_paid, amount)''',
+        '''CREATE INDEX IF NOT EXISTS idx_credits_status
+           ON credits (status, created_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_credits_customer
+           ON credits (customer_id, status)''',
+        '''CREATE INDEX IF NOT EXISTS idx_customers_name
+           ON customers (name)''',
+    ]),
+    (2, [
+        # Ringkasan pembayaran per kredit, diperbarui oleh add_payment
+        # dalam transaksi yang sama (lihat rebuild_summaries/check_summaries)
+        '''CREATE TABLE IF NOT EXISTS payment_summaries (
+               credit_id INTEGER PRIMARY KEY,
+               total_days_paid INTEGER NOT NULL DEFAULT 0,
+               total_amount_paid REAL NOT NULL DEFAULT 0,
+               payment_count INTEGER NOT NULL DEFAULT 0,
+               last_payment_date DATE,
+               FOREIGN KEY (credit_id) REFERENCES credits (id)
+           )''',
+        lambda db, cursor: db._rebuild_summaries(cursor),
+    ]),
+    (3, [
+        # Pengaturan aplikasi (mis. key-check value kata sandi)
+        '''CREATE TABLE IF NOT EXISTS app_meta (
+               key TEXT PRIMARY KEY,
+               value TEXT
+           )''',
+    ]),
+    (4, [
+        # end_date tidak lagi dimundurkan oleh mark_holiday; kembalikan ke
+        # jatuh tempo dasar agar hari libur tidak terhitung dua kali
+        RESET_END_DATES_SQL,
+    ]),
+    (5, [
+        # Pencarian pelanggan: awalan nama lewat indeks NOCASE (LIKE 'x%'),
+        # substring lewat FTS5 trigram (dilewati jika SQLite tidak mendukung)
+        '''CREATE INDEX IF NOT EXISTS idx_customers_name_nocase
+           ON customers (name COLLATE NOCASE)''',
+        lambda db, cursor: db._create_search_index(cursor),
+    ]),
+    (6, [
+        # Halaman kredit per status urut id (get_credits_page/iter_credits)
+        '''CREATE INDEX IF NOT EXISTS idx_credits_status_id
+           ON credits (status, id)''',
+    ]),
+    (7, [
+        # Buku pembayaran per tanggal (iter_payments_between/get_payments_on)
+        '''CREATE INDEX IF NOT EXISTS idx_payments_date
+           ON payments (payment_date)''',
+    ]),
+    (8, [
+        # Covering index untuk total setoran per hari (analytics.portfolio_report)
+        '''CREATE INDEX IF NOT EXISTS idx_payments_date_amount
+           ON payments (payment_date, amount)''',
+    ]),
+]
+
+# Indeks pencarian nama/telepon pelanggan. Tabel ini (dan tabel bayangan
+# customers_fts_*) turunan dari customers: tidak ikut di-backup, dibangun
+# ulang setelah restore.
+SEARCH_INDEX_TABLE = 'customers_fts'
+
+SEARCH_INDEX_TRIGGERS = {
+    'customers_fts_ai': '''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN
+            INSERT INTO customers_fts (rowid, name, phone)
+            VALUES (new.id, new.name, new.phone);
+        END''',
+    'customers_fts_ad': '''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN
+            INSERT INTO customers_fts (customers_fts, rowid, name, phone)
+            VALUES ('delete', old.id, old.name, old.phone);
+        END''',
+    'customers_fts_au': '''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_au AFTER UPDATE OF name, phone ON customers BEGIN
+            INSERT INTO customers_fts (customers_fts, rowid, name, phone)
+            VALUES ('delete', old.id, old.name, old.phone);
+            INSERT INTO customers_fts (rowid, name, phone)
+            VALUES (new.id, new.name, new.phone);
+        END''',
+}
+
+SEARCH_INDEX_REBUILD_SQL = f"INSERT INTO {SEARCH_INDEX_TABLE} ({SEARCH_INDEX_TABLE}) VALUES ('rebuild')"
+
+# Hitung ulang seluruh payment_summaries dari tabel payments (dipakai juga
+# oleh restore backup, dengan atau tanpa DatabaseManager)
+REBUILD_SUMMARIES_SQL = (
+    'DELETE FROM payment_summaries',
+    '''
+    INSERT INTO payment_summaries
+        (credit_id, total_days_paid, total_amount_paid, payment_count, last_payment_date)
+    SELECT c.id,
+           COALESCE(SUM(p.days_paid), 0),
+           COALESCE(SUM(p.amount), 0),
+           COUNT(p.id),
+           MAX(p.payment_date)
+    FROM credits c
+    LEFT JOIN payments p ON p.credit_id = c.id
+    GROUP BY c.id
+    ''',
+)
+
+# Kolom kredit + nama pelanggan + ringkasan pembayaran (lihat _credit_from_row)
+CREDIT_SELECT = '''
+    SELECT c.id, c.customer_id, c.item_name, c.total_price, c.daily_amount,
+           c.total_days, c.start_date, c.end_date, c.status, c.created_at,
+           c.data_encrypted, cust.name as customer_name,
+           COALESCE(s.total_days_paid, 0),
+           COALESCE(s.total_amount_paid, 0),
+           COALESCE(s.payment_count, 0),
+           s.last_payment_date
+    FROM credits c
+    JOIN customers cust ON c.customer_id = cust.id
+    LEFT JOIN payment_summaries s ON s.credit_id = c.id
+'''
+
+# Kolom urut get_credits_sorted_page: key record -> ekspresi SQL di CREDIT_SELECT
+CREDIT_SORT_COLUMNS = {
+    'id': 'c.id',
+    'customer_name': 'cust.name COLLATE NOCASE',
+    'item_name': 'c.item_name COLLATE NOCASE',
+    'total_price': 'c.total_price',
+    'total_amount_paid': 'COALESCE(s.total_amount_paid, 0)',
+    'remaining_amount': 'MAX(0, c.total_days - COALESCE(s.total_days_paid, 0)) * c.daily_amount'
+}
+
+# Pencarian toleran salah ketik: jumlah kandidat yang dinilai ulang dan
+# kemiripan minimal (rata-rata per kata, 0..1)
+FUZZY_CANDIDATES = 50
+FUZZY_MIN_SCORE = 0.7
+
+# Profil durabilitas: pragma yang diterapkan ke setiap koneksi.
+# Semua profil memakai WAL agar pembacaan (mis. thread backup) tidak
+# memblokir penulisan pembayaran, dan sebaliknya.
+#   safe     - fsync setiap commit (paling aman saat listrik/HP mati mendadak)
+#   balanced - fsync saat checkpoint saja; commit tetap atomik (default)
+#   fast     - tanpa fsync; data commit terakhir bisa hilang jika OS crash
+DURABILITY_PROFILES = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -2000,          # KiB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'wal_autocheckpoint': 1000,   # halaman
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -8000,
+        'mmap_size': 32 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 4000,
+    },
+}
+
+DEFAULT_DURABILITY = 'balanced'
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+class LazyRecord(dict):
+    """dict hasil query yang mendekripsi data_encrypted hanya saat dibutuhkan.
+    
+    Kolom plaintext langsung tersedia. Payload terenkripsi baru didekripsi
+    saat field sensitif yang belum ada diakses, atau saat seluruh isi dict
+    dibaca (iterasi, items(), perbandingan, dll). Nilai hasil dekripsi tidak
+    menimpa key yang sudah ada.
+    """
+    
+    def __init__(self, data, encrypted, decrypt):
+        super().__init__(data)
+        self._encrypted = encrypted or None
+        self._decrypt = decrypt
+    
+    @property
+    def is_decrypted(self):
+        return self._encrypted is None
+    
+    def _load(self, decrypted=None):
+        """Gabungkan payload terdekripsi ke dict (sekali saja)"""
+        if self._encrypted is None:
+            return
+        encrypted, self._encrypted = self._encrypted, None
+        if decrypted is None:
+            try:
+                decrypted = self._decrypt(encrypted)
+            except Exception:
+                decrypted = {}
+        for key, value in decrypted.items():
+            if not dict.__contains__(self, key):
+                dict.__setitem__(self, key, value)
+    
+    def __missing__(self, key):
+        if self._encrypted is None:
+            raise KeyError(key)
+        self._load()
+        return dict.__getitem__(self, key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        self._load()
+        return dict.__contains__(self, key)
+    
+    def __iter__(self):
+        self._load()
+        return dict.__iter__(self)
+    
+    def __len__(self):
+        self._load()
+        return dict.__len__(self)
+    
+    def __eq__(self, other):
+        self._load()
+        if isinstance(other, LazyRecord):
+            other._load()
+        return dict.__eq__(self, other)
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        self._load()
+        return dict.__repr__(self)
+    
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+    
+    def values(self):
+        self._load()
+        return dict.values(self)
+    
+    def items(self):
+        self._load()
+        return dict.items(self)
+    
+    def copy(self):
+        self._load()
+        return dict(self)
+
+
+class ConnectionManager:
+    """Kelola koneksi SQLite jangka panjang, satu koneksi per thread"""
+    
+    def __init__(self, db_path, timeout=5.0, profile=DEFAULT_DURABILITY):
+        if profile not in DURABILITY_PROFILES:
+            raise ValueError(f"Profil durabilitas tidak dikenal: {profile}")
+        
+        self.db_path = db_path
+        self.timeout = timeout
+        self.profile = profile
+        self._profile_version = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # thread ident -> (thread, connection)
+    
+    def _open(self):
+        """Buka koneksi baru dalam mode autocommit (transaksi diatur manual)"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._apply_profile(conn)
+        return conn
+    
+    def _apply_profile(self, conn):
+        """Terapkan pragma profil durabilitas aktif ke koneksi"""
+        settings = DURABILITY_PROFILES[self.profile]
+        # Nilai pragma berasal dari DURABILITY_PROFILES, bukan input pengguna
+        for pragma, value in settings.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        self._local.profile_version = self._profile_version
+    
+    def set_profile(self, profile):
+        """Ganti profil durabilitas; koneksi thread lain ikut saat dipakai berikutnya"""
+        if profile not in DURABILITY_PROFILES:
+            raise ValueError(f"Profil durabilitas tidak dikenal: {profile}")
+        
+        with self._lock:
+            self.profile = profile
+            self._profile_version += 1
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and not conn.in_transaction:
+            self._apply_profile(conn)
+    
+    def checkpoint(self, mode='PASSIVE'):
+        """Pindahkan isi WAL ke file database. Return (busy, wal_pages, checkpointed)"""
+        mode = mode.upper()
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Mode checkpoint tidak dikenal: {mode}")
+        
+        return self.connection().execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+    
+    def _prune_dead_threads(self):
+        """Tutup koneksi milik thread yang sudah selesai (mis. worker printer)"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._connections[ident]
+    
+    def connection(self):
+        """Ambil koneksi milik thread saat ini, dibuat sekali per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._prune_dead_threads()
+                self._connections[threading.get_ident()] = (threading.current_thread(), conn)
+        elif (getattr(self._local, 'profile_version', None) != self._profile_version
+                and not conn.in_transaction):
+            self._apply_profile(conn)
+        return conn
+    
+    def cursor(self):
+        """Cursor baru dari koneksi thread saat ini (untuk query baca)"""
+        return self.connection().cursor()
+    
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Transaksi: commit jika sukses, rollback jika terjadi error"""
+        conn = self.connection()
+        
+        # Transaksi bersarang ikut ke transaksi luar
+        if conn.in_transaction:
+            yield conn.cursor()
+            return
+        
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+    
+    def close(self):
+        """Tutup koneksi milik thread saat ini"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                self._connections.pop(threading.get_ident(), None)
+            conn.close()
+    
+    def close_all(self):
+        """Tutup semua koneksi (dipanggil saat aplikasi berhenti)"""
+        # Kosongkan WAL agar file database utuh tanpa file -wal
+        try:
+            self.checkpoint('TRUNCATE')
+        except sqlite3.Error:
+            pass
+        
+        with self._lock:
+            for thread, conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
 
 class DatabaseManager:
     """Manager untuk database dengan enkripsi"""
     
-    def __init__(self, password):
+    def __init__(self, db_path, password, durability=DEFAULT_DURABILITY):
         self.password = password
-        self.db_path = 'kredit_data.db'
+        self.db_path = db_path
         self.key = self._derive_key(password)
         self.cipher = Fernet(self.key)
+        self.connections = ConnectionManager(db_path, profile=durability)
+        self._holiday_calendar = None  # HolidayCalendar, dimuat saat pertama dipakai
+        self._holiday_generation = 0   # naik setiap cache kalender dibuang
+        self._holiday_lock = threading.Lock()
+        self._search_index = None      # True/False setelah dicek pertama kali
+        self.events = EventBus()           # event perubahan data (lihat events.py)
+        self.stats = DashboardStats(self)  # penghitung dashboard di memori
+        self.events.subscribe(self.stats.on_event)
         self.init_database()
+        self._verify_password()
+    
+    def close(self):
+        """Tutup semua koneksi database"""
+        self.connections.close_all()
+    
+    def set_durability(self, profile):
+        """Ganti profil durabilitas: 'safe', 'balanced' atau 'fast'"""
+        self.connections.set_profile(profile)
+    
+    def checkpoint(self, mode='PASSIVE'):
+        """Checkpoint WAL (PASSIVE tidak menunggu pembaca/penulis lain)"""
+        return self.connections.checkpoint(mode)
     
     def _derive_key(self, password):
-        """Derive encryption key dari password menggunakan PBKDF2"""
-        # Salt tetap untuk konsistensi (dalam produksi, gunakan salt random yang disimpan)
-        salt = b'toko_kredit_syariah_salt_2025'
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        return key
+        """Derive encryption key dari password (PBKDF2, di-cache per sesi)"""
+        return get_key_service().master_key(password)
+    
+    def _verify_password(self):
+        """Tolak kata sandi salah lewat key-check value tanpa derive ulang"""
+        with self.connections.transaction() as cursor:
+            cursor.execute("SELECT value FROM app_meta WHERE key = 'key_check'")
+            row = cursor.fetchone()
+            
+            if row:
+                if not verify_key_check(self.key, row[0]):
+                    raise InvalidPasswordError("Kata sandi salah")
+                return
+            
+            # Database lama tanpa key-check: cocokkan dengan data terenkripsi yang ada
+            cursor.execute('''
+                SELECT data_encrypted FROM customers
+                WHERE data_encrypted IS NOT NULL LIMIT 1
+            ''')
+            sample = cursor.fetchone()
+            if sample:
+                try:
+                    self.cipher.decrypt(sample[0].encode())
+                except Exception:
+                    raise InvalidPasswordError("Kata sandi salah")
+            
+            cursor.execute(
+                "INSERT INTO app_meta (key, value) VALUES ('key_check', ?)",
+                (make_key_check(self.key),)
+            )
     
     def init_database(self):
         """Inisialisasi database dan tabel"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.connections.transaction() as cursor:
+            self._create_tables(cursor)
+            self._migrate(cursor)
+    
+    def _migrate(self, cursor):
+        """Jalankan migrasi skema yang belum diterapkan"""
+        cursor.execute('PRAGMA user_version')
+        current_version = cursor.fetchone()[0]
         
+        for version, steps in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            
+            for step in steps:
+                if callable(step):
+                    step(self, cursor)
+                else:
+                    cursor.execute(step)
+            
+            # PRAGMA tidak mendukung parameter; version selalu int dari daftar di atas
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+    
+    def _create_tables(self, cursor):
+        """Buat tabel jika belum ada"""
         # Tabel pelanggan
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS customers (
@@ -109,9 +575,6 @@ class DatabaseManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
     
     def encrypt_data(self, data):
         """Enkripsi data sensitif"""
@@ -127,13 +590,40 @@ class DatabaseManager:
         except:
             return {}
     
+    def decrypt_many(self, encrypted_list):
+        """Dekripsi banyak payload sekaligus dengan satu cipher"""
+        decrypt = self.cipher.decrypt
+        loads = json.loads
+        
+        results = []
+        append = results.append
+        for encrypted_data in encrypted_list:
+            if not encrypted_data:
+                append({})
+                continue
+            try:
+                append(loads(decrypt(encrypted_data.encode())))
+            except Exception:
+                append({})
+        
+        return results
+    
+    def decrypt_records(self, records):
+        """Paksa dekripsi sekumpulan LazyRecord dalam satu loop (mis. untuk ekspor)"""
+        pending = [r for r in records if isinstance(r, LazyRecord) and not r.is_decrypted]
+        decrypted = self.decrypt_many([r._encrypted for r in pending])
+        for record, data in zip(pending, decrypted):
+            record._load(data)
+        return records
+    
+    def _record(self, data, encrypted):
+        """Bungkus hasil query; data_encrypted didekripsi saat dibutuhkan"""
+        return LazyRecord(data, encrypted, self.decrypt_data)
+    
     # === CUSTOMER OPERATIONS ===
     
     def add_customer(self, name, address="", phone="", credit_limit=0):
         """Tambah pelanggan baru"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Data sensitif yang akan dienkripsi
         sensitive_data = {
             'address': address,
@@ -143,94 +633,251 @@ class DatabaseManager:
         
         encrypted_data = self.encrypt_data(sensitive_data)
         
-        cursor.execute('''
-            INSERT INTO customers (name, address, phone, credit_limit, data_encrypted)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (name, address, phone, credit_limit, encrypted_data))
-        
-        customer_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.connections.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO customers (name, address, phone, credit_limit, data_encrypted)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (name, address, phone, credit_limit, encrypted_data))
+            
+            customer_id = cursor.lastrowid
         
+        self.events.publish(CustomerAdded(customer_id, name, phone))
         return customer_id
     
     def get_customers(self, search_term=""):
         """Ambil daftar pelanggan"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         if search_term:
-            cursor.execute('''
-                SELECT * FROM customers 
-                WHERE name LIKE ? OR phone LIKE ?
-                ORDER BY name
-            ''', (f'%{search_term}%', f'%{search_term}%'))
-        else:
-            cursor.execute('SELECT * FROM customers ORDER BY name')
+            return self.search_customers(search_term, limit=None, fuzzy=False)
+        
+        cursor = self.connections.cursor()
+        cursor.execute('SELECT * FROM customers ORDER BY name')
         
-        customers = []
+        return [self._customer_from_row(row) for row in cursor.fetchall()]
+    
+    def search_customers(self, query, limit=20, offset=0, fuzzy=True):
+        """Cari pelanggan berdasarkan nama atau nomor telepon.
+        
+        Urutan hasil: nama diawali `query`, lalu nama/telepon yang
+        mengandung `query` (tanpa beda huruf besar/kecil), lalu - jika
+        `fuzzy` dan hasil belum mencapai `limit` - pelanggan yang mirip
+        (toleran salah ketik). `limit=None` berarti tanpa batas.
+        """
+        query = (query or '').strip()
+        wanted = None if limit is None else offset + limit
+        cursor = self.connections.cursor()
+        
+        if not query:
+            cursor.execute(
+                'SELECT * FROM customers ORDER BY name COLLATE NOCASE LIMIT ? OFFSET ?',
+                (-1 if limit is None else limit, offset)
+            )
+            return [self._customer_from_row(row) for row in cursor.fetchall()]
+        
+        # 1. Nama diawali query: range scan di idx_customers_name_nocase
+        cursor.execute('''
+            SELECT * FROM customers
+            WHERE name LIKE ?
+            ORDER BY name COLLATE NOCASE
+            LIMIT ?
+        ''', (f'{query}%', -1 if wanted is None else wanted))
+        rows = cursor.fetchall()
+        seen = {row[0] for row in rows}
+        
+        # 2. Nama/telepon mengandung query: FTS5 trigram, atau LIKE untuk
+        # query < 3 karakter (trigram butuh minimal 3) dan SQLite tanpa FTS5
+        if wanted is None or len(rows) < wanted:
+            fetch = -1 if wanted is None else wanted + len(rows)
+            if len(query) >= 3 and self._has_search_index():
+                cursor.execute('''
+                    SELECT c.* FROM customers_fts f
+                    JOIN customers c ON c.id = f.rowid
+                    WHERE customers_fts MATCH ?
+                    ORDER BY c.name COLLATE NOCASE
+                    LIMIT ?
+                ''', (self._fts_phrase(query), fetch))
+            else:
+                # "+name": scan tabel lalu urutkan hasil (paling lama ~5 ms di
+                # 20k baris), bukan menelusuri indeks nama yang bisa jauh
+                # lebih lama jika kecocokannya sedikit
+                pattern = f'%{query}%'
+                cursor.execute('''
+                    SELECT * FROM customers
+                    WHERE name LIKE ? OR phone LIKE ?
+                    ORDER BY +name COLLATE NOCASE
+                    LIMIT ?
+                ''', (pattern, pattern, fetch))
+            
+            for row in cursor.fetchall():
+                if row[0] not in seen:
+                    seen.add(row[0])
+                    rows.append(row)
+        
+        # 3. Toleran salah ketik
+        if fuzzy and (wanted is None or len(rows) < wanted) and len(query) >= 3 \
+                and self._has_search_index():
+            rows.extend(self._fuzzy_customer_rows(
+                cursor, query, seen, None if wanted is None else wanted - len(rows)
+            ))
+        
+        if wanted is not None:
+            rows = rows[:wanted]
+        return [self._customer_from_row(row) for row in rows[offset:]]
+    
+    def _fuzzy_customer_rows(self, cursor, query, exclude, limit):
+        """Pelanggan yang mirip query, urut kemiripan.
+        
+        Kandidat: pelanggan yang paling banyak berbagi trigram dengan query
+        (satu lookup indeks per trigram). Kandidat lalu dinilai per kata
+        dengan difflib, sehingga salah ketik/huruf tertukar tetap ketemu.
+        """
+        query_words = query.lower().split()
+        trigrams = [self._fts_phrase(trigram) for trigram in self._trigrams(query)]
+        if not trigrams:
+            return []
+        
+        # Hitung trigram yang cocok per pelanggan di SQLite, ambil yang terbanyak
+        lookup = f'SELECT rowid FROM {SEARCH_INDEX_TABLE} WHERE {SEARCH_INDEX_TABLE} MATCH ?'
+        cursor.execute(f'''
+            SELECT rowid FROM ({' UNION ALL '.join([lookup] * len(trigrams))})
+            GROUP BY rowid
+            ORDER BY COUNT(*) DESC
+            LIMIT ?
+        ''', trigrams + [FUZZY_CANDIDATES + len(exclude)])
+        
+        candidates = [row[0] for row in cursor.fetchall() if row[0] not in exclude][:FUZZY_CANDIDATES]
+        if not candidates:
+            return []
+        
+        cursor.execute(
+            f'SELECT * FROM customers WHERE id IN ({",".join("?" * len(candidates))})',
+            candidates
+        )
+        
+        # Nama depan/belakang banyak yang sama: hitung kemiripan per pasangan kata sekali saja
+        similarity = {}
+        
+        def word_score(word, words):
+            if any(candidate.startswith(word) for candidate in words):
+                return 1.0
+            best = 0.0
+            for candidate in words:
+                key = (word, candidate)
+                if key not in similarity:
+                    similarity[key] = self._word_similarity(word, candidate)
+                best = max(best, similarity[key])
+            return best
+        
+        scored = []
         for row in cursor.fetchall():
-            customer = {
-                'id': row[0],
-                'name': row[1],
-                'address': row[2],
-                'phone': row[3],
-                'credit_limit': row[4],
-                'created_at': row[5]
-            }
+            words = f'{row[1]} {row[3] or ""}'.lower().split()
+            score = sum(word_score(word, words) for word in query_words) / len(query_words)
+            if score >= FUZZY_MIN_SCORE:
+                scored.append((-score, row[1].lower(), row))
+        
+        scored.sort(key=lambda item: item[:2])
+        rows = [item[2] for item in scored]
+        return rows if limit is None else rows[:limit]
+    
+    @staticmethod
+    def _word_similarity(word, candidate):
+        """Kemiripan dua kata (0..1); awalan kata dianggap cocok penuh
+        karena query bisa saja belum selesai diketik"""
+        if candidate.startswith(word):
+            return 1.0
+        
+        matcher = SequenceMatcher(None, candidate, word)
+        if matcher.quick_ratio() < FUZZY_MIN_SCORE / 2:
+            return 0.0  # huruf yang sama terlalu sedikit, tidak perlu dihitung rinci
+        best = matcher.ratio()
+        matcher.set_seq1(candidate[:len(word)])
+        return max(best, matcher.ratio())
+    
+    @staticmethod
+    def _trigrams(text):
+        """Trigram per kata (huruf kecil); trigram lintas spasi tidak dipakai"""
+        return {word[i:i + 3] for word in text.lower().split() for i in range(len(word) - 2)}
+    
+    @staticmethod
+    def _fts_phrase(text):
+        """Query FTS5 berupa satu frase (aman dari operator/karakter khusus)"""
+        return '"' + text.replace('"', '""') + '"'
+    
+    def _create_search_index(self, cursor):
+        """Buat indeks FTS5 trigram beserta trigger sinkronisasinya"""
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE} USING fts5(
+                    name, phone,
+                    content='customers', content_rowid='id',
+                    tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # FTS5/trigram tidak tersedia (SQLite < 3.34): tetap pakai LIKE
+            return
+        
+        for trigger_sql in SEARCH_INDEX_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+        cursor.execute(SEARCH_INDEX_REBUILD_SQL)
+        self._search_index = None
+    
+    def _has_search_index(self):
+        """Cek (sekali) apakah indeks pencarian ada dan bisa dipakai"""
+        if self._search_index is None:
+            cursor = self.connections.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (SEARCH_INDEX_TABLE,)
+            )
+            available = cursor.fetchone()[0] > 0
             
-            # Decrypt additional data if exists
-            if row[6]:
+            if available:
                 try:
-                    additional_data = self.decrypt_data(row[6])
-                    customer.update(additional_data)
-                except:
-                    pass
+                    cursor.execute(f'SELECT rowid FROM {SEARCH_INDEX_TABLE} LIMIT 0')
+                except sqlite3.OperationalError:
+                    # Modul FTS5 hilang dari build SQLite ini: lepas trigger
+                    # agar add_customer tetap jalan
+                    available = False
+                    with self.connections.transaction() as write_cursor:
+                        for name in SEARCH_INDEX_TRIGGERS:
+                            write_cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
             
-            customers.append(customer)
-        
-        conn.close()
-        return customers
+            self._search_index = available
+        return self._search_index
+    
+    def rebuild_search_index(self):
+        """Maintenance: bangun ulang indeks pencarian dari tabel customers"""
+        if self._has_search_index():
+            with self.connections.transaction() as cursor:
+                cursor.execute(SEARCH_INDEX_REBUILD_SQL)
     
     def get_customer(self, customer_id):
         """Ambil data pelanggan berdasarkan ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.connections.cursor()
         
         cursor.execute('SELECT * FROM customers WHERE id = ?', (customer_id,))
         row = cursor.fetchone()
         
         if row:
-            customer = {
-                'id': row[0],
-                'name': row[1],
-                'address': row[2],
-                'phone': row[3],
-                'credit_limit': row[4],
-                'created_at': row[5]
-            }
-            
-            # Decrypt additional data
-            if row[6]:
-                try:
-                    additional_data = self.decrypt_data(row[6])
-                    customer.update(additional_data)
-                except:
-                    pass
-            
-            conn.close()
-            return customer
+            return self._customer_from_row(row)
         
-        conn.close()
         return None
     
+    def _customer_from_row(self, row):
+        """Susun record pelanggan dari baris tabel customers"""
+        return self._record({
+            'id': row[0],
+            'name': row[1],
+            'address': row[2],
+            'phone': row[3],
+            'credit_limit': row[4],
+            'created_at': row[5]
+        }, row[6])
+    
     # === CREDIT OPERATIONS ===
     
     def add_credit(self, customer_id, item_name, total_price, total_days):
         """Tambah kredit baru"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Hitung cicilan harian (pembulatan ke atas)
         daily_amount = int((total_price + total_days - 1) // total_days)  # Ceiling division
         
@@ -246,294 +893,888 @@ class DatabaseManager:
         
         encrypted_data = self.encrypt_data(sensitive_data)
         
-        cursor.execute('''
-            INSERT INTO credits (customer_id, item_name, total_price, daily_amount, 
-                               total_days, start_date, end_date, data_encrypted)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (customer_id, item_name, total_price, daily_amount, total_days, 
-              start_date, end_date, encrypted_data))
-        
-        credit_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.connections.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO credits (customer_id, item_name, total_price, daily_amount, 
+                                   total_days, start_date, end_date, data_encrypted)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (customer_id, item_name, total_price, daily_amount, total_days, 
+                  start_date, end_date, encrypted_data))
+            
+            credit_id = cursor.lastrowid
+            
+            cursor.execute('INSERT INTO payment_summaries (credit_id) VALUES (?)', (credit_id,))
+            
+            cursor.execute('SELECT name FROM customers WHERE id = ?', (customer_id,))
+            row = cursor.fetchone()
         
+        self.events.publish(CreditAdded(
+            credit_id, customer_id, row[0] if row else '', item_name,
+            total_price, daily_amount, total_days, start_date
+        ))
         return credit_id
     
     def get_credits(self, customer_id=None, status='active'):
-        """Ambil daftar kredit"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Ambil daftar kredit beserta ringkasan pembayaran (satu query)"""
+        cursor = self.connections.cursor()
         
+        conditions = ['c.status = ?']
+        params = [status]
         if customer_id:
-            cursor.execute('''
-                SELECT c.*, cust.name as customer_name 
-                FROM credits c
-                JOIN customers cust ON c.customer_id = cust.id
-                WHERE c.customer_id = ? AND c.status = ?
-                ORDER BY c.created_at DESC
-            ''', (customer_id, status))
-        else:
-            cursor.execute('''
-                SELECT c.*, cust.name as customer_name 
-                FROM credits c
-                JOIN customers cust ON c.customer_id = cust.id
-                WHERE c.status = ?
-                ORDER BY c.created_at DESC
-            ''', (status,))
-        
-        credits = []
-        for row in cursor.fetchall():
-            credit = {
-                'id': row[0],
-                'customer_id': row[1],
-                'item_name': row[2],
-                'total_price': row[3],
-                'daily_amount': row[4],
-                'total_days': row[5],
-                'start_date': row[6],
-                'end_date': row[7],
-                'status': row[8],
-                'created_at': row[9],
-                'customer_name': row[11]
+            conditions.append('c.customer_id = ?')
+            params.append(customer_id)
+        
+        # Ringkasan pembayaran dibaca dari payment_summaries (O(1) per kredit),
+        # bukan get_payment_summary() per kredit (N+1)
+        cursor.execute(f'''
+            {CREDIT_SELECT}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY c.created_at DESC, c.id DESC
+        ''', params)
+        
+        return [self._credit_from_row(row) for row in cursor.fetchall()]
+    
+    def get_credit(self, credit_id):
+        """Ambil satu kredit (status apa pun) beserta ringkasan dan
+        pembayaran terakhirnya dalam satu query.
+        
+        Kredit lewat primary key, ringkasan dari payment_summaries dan
+        pembayaran terakhir lewat idx_payments_credit_date, jadi waktunya
+        tidak bergantung pada jumlah kredit/pembayaran. `last_payment` berisi
+        id, amount, payment_date, days_paid dan remaining_days (sisa hari
+        setelah pembayaran itu), atau None jika belum ada pembayaran.
+        """
+        cursor = self.connections.cursor()
+        cursor.execute(f'''
+            SELECT credit.*, p.id, p.amount, p.payment_date, p.days_paid, p.remaining_days
+            FROM ({CREDIT_SELECT} WHERE c.id = ?) AS credit
+            LEFT JOIN payments p ON p.id = (
+                SELECT id FROM payments
+                WHERE credit_id = ?
+                ORDER BY payment_date DESC, id DESC
+                LIMIT 1
+            )
+        ''', (credit_id, credit_id))
+        
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        credit = self._credit_from_row(row)
+        credit['last_payment'] = None
+        if row[16] is not None:
+            credit['last_payment'] = {
+                'id': row[16],
+                'amount': row[17],
+                'payment_date': row[18],
+                'days_paid': row[19],
+                'remaining_days': row[20]
             }
-            
-            # Decrypt additional data
-            if row[10]:
-                try:
-                    additional_data = self.decrypt_data(row[10])
-                    credit.update(additional_data)
-                except:
-                    pass
-            
-            # Calculate payment status
-            payment_info = self.get_payment_summary(row[0])
-            credit.update(payment_info)
-            
-            credits.append(credit)
         
-        conn.close()
-        return credits
+        return credit
+    
+    def search_credits(self, query, limit=20, status='active'):
+        """Cari kredit berdasarkan pelanggan (nama/telepon, lihat
+        search_customers) atau nama barang.
+        
+        Kredit dari pelanggan yang paling cocok di atas, lalu yang cocok
+        nama barangnya. Query kosong: kredit urut nama pelanggan.
+        """
+        query = (query or '').strip()
+        if not query:
+            return self.get_credits_sorted_page('customer_name', status=status, limit=limit)
+        
+        customers = self.search_customers(query, limit=limit)
+        rank = {customer['id']: i for i, customer in enumerate(customers)}
+        cursor = self.connections.cursor()
+        
+        # 1. Kredit milik pelanggan yang cocok (idx_credits_customer)
+        rows = []
+        if rank:
+            cursor.execute(f'''
+                {CREDIT_SELECT}
+                WHERE c.status = ? AND c.customer_id IN ({','.join('?' * len(rank))})
+            ''', [status] + list(rank))
+            rows = sorted(cursor.fetchall(), key=lambda row: (rank[row[1]], row[0]))[:limit]
+        
+        # 2. Nama barang mengandung query
+        if len(rows) < limit:
+            seen = {row[0] for row in rows}
+            cursor.execute(f'''
+                {CREDIT_SELECT}
+                WHERE c.status = ? AND c.item_name LIKE ?
+                ORDER BY cust.name COLLATE NOCASE, c.id
+                LIMIT ?
+            ''', (status, f'%{query}%', limit))
+            rows.extend(row for row in cursor.fetchall() if row[0] not in seen)
+        
+        return [self._credit_from_row(row) for row in rows[:limit]]
+    
+    def _credit_from_row(self, row):
+        """Susun record kredit dari baris CREDIT_SELECT"""
+        # Data terenkripsi (item_details, original_price, notes) didekripsi saat diakses
+        credit = self._record({
+            'id': row[0],
+            'customer_id': row[1],
+            'item_name': row[2],
+            'total_price': row[3],
+            'daily_amount': row[4],
+            'total_days': row[5],
+            'start_date': row[6],
+            'end_date': self.due_date(row[6], row[5]).isoformat(),
+            'status': row[8],
+            'created_at': row[9],
+            'customer_name': row[11]
+        }, row[10])
+        
+        # Calculate payment status
+        credit.update(self._summarize_payments(
+            row[5], row[4], row[12], row[13], row[14], row[15]
+        ))
+        
+        return credit
     
     # === PAYMENT OPERATIONS ===
     
     def add_payment(self, credit_id, amount, payment_date=None):
-        """Tambah pembayaran dengan logika fleksibel"""
+        """Tambah pembayaran dengan logika fleksibel.
+        
+        Baca ringkasan, simpan pembayaran, perbarui ringkasan dan status
+        berjalan dalam satu transaksi BEGIN IMMEDIATE, sehingga tidak bisa
+        diselingi penulis lain (thread backup, worker, dll). Mengembalikan
+        hasil posting (pembayaran ini, data kredit untuk struk dan total
+        terbaru kredit - siap untuk Receipt.from_payment), atau False jika
+        kredit tidak ditemukan.
+        """
         if payment_date is None:
             payment_date = datetime.now().date()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Ambil info kredit
-        cursor.execute('SELECT * FROM credits WHERE id = ?', (credit_id,))
-        credit = cursor.fetchone()
+        with self.connections.transaction(immediate=True) as cursor:
+            result = self._post_payment(cursor, credit_id, amount, payment_date)
         
-        if not credit:
-            conn.close()
+        if not result:
             return False
+        self.events.publish(PaymentPosted(result))
+        return result
+    
+    def _post_payment(self, cursor, credit_id, amount, payment_date):
+        """Posting satu pembayaran di dalam transaksi pemanggil"""
+        # Format sama dengan adapter sqlite3 untuk date ('YYYY-MM-DD')
+        payment_date = str(payment_date)
         
-        daily_amount = credit[4]  # daily_amount
-        total_days = credit[5]    # total_days
-        
-        # Hitung sudah bayar berapa hari
+        # Ambil info kredit beserta ringkasan pembayarannya
         cursor.execute('''
-            SELECT COALESCE(SUM(days_paid), 0) as total_days_paid
-            FROM payments WHERE credit_id = ?
+            SELECT c.daily_amount, c.total_days,
+                   COALESCE(s.total_days_paid, 0),
+                   COALESCE(s.total_amount_paid, 0),
+                   COALESCE(s.payment_count, 0),
+                   s.last_payment_date,
+                   c.item_name, c.total_price, cust.name
+            FROM credits c
+            JOIN customers cust ON cust.id = c.customer_id
+            LEFT JOIN payment_summaries s ON s.credit_id = c.id
+            WHERE c.id = ?
         ''', (credit_id,))
+        credit = cursor.fetchone()
         
-        total_days_paid = cursor.fetchone()[0]
+        if not credit:
+            return None
         
-        # Logika pembayaran fleksibel
-        if amount < daily_amount:
-            # Bayar kurang: tetap 1x setor, sisa hari tetap
-            days_paid = 1
-            remaining_days = total_days - total_days_paid - 1
-        elif amount >= daily_amount:
-            # Bayar cukup/lebih: hitung berapa hari terlunasi
-            days_paid = min(int(amount // daily_amount), total_days - total_days_paid)
-            remaining_days = total_days - total_days_paid - days_paid
+        daily_amount, total_days, total_days_paid, total_amount_paid, \
+            payment_count, last_payment_date, item_name, total_price, customer_name = credit
         
-        # Pastikan tidak minus
-        remaining_days = max(0, remaining_days)
+        days_paid, remaining_days = self._compute_days_paid(
+            amount, daily_amount, total_days, total_days_paid)
         
         # Simpan pembayaran
         cursor.execute('''
             INSERT INTO payments (credit_id, amount, payment_date, days_paid, remaining_days)
             VALUES (?, ?, ?, ?, ?)
         ''', (credit_id, amount, payment_date, days_paid, remaining_days))
+        payment_id = cursor.lastrowid
+        
+        self._apply_to_summary(cursor, credit_id, days_paid, amount, payment_date)
         
         # Update status kredit jika lunas
         if remaining_days == 0:
             cursor.execute('UPDATE credits SET status = ? WHERE id = ?', ('completed', credit_id))
         
-        conn.commit()
-        conn.close()
+        result = {
+            'payment_id': payment_id,
+            'credit_id': credit_id,
+            'customer_name': customer_name,
+            'item_name': item_name,
+            'total_price': total_price,
+            'amount': amount,
+            'payment_date': payment_date,
+            'days_paid': days_paid,
+            'daily_amount': daily_amount,
+            'total_days': total_days,
+            'status': 'completed' if remaining_days == 0 else 'active'
+        }
+        result.update(self._summarize_payments(
+            total_days, daily_amount,
+            total_days_paid + days_paid,
+            total_amount_paid + amount,
+            payment_count + 1,
+            max(last_payment_date or payment_date, payment_date)
+        ))
+        
+        return result
+    
+    def _compute_days_paid(self, amount, daily_amount, total_days, total_days_paid):
+        """Logika pembayaran fleksibel, return (days_paid, remaining_days)"""
+        if amount < daily_amount:
+            # Bayar kurang: tetap 1x setor, sisa hari tetap
+            days_paid = 1
+            remaining_days = total_days - total_days_paid - 1
+        else:
+            # Bayar cukup/lebih: hitung berapa hari terlunasi
+            days_paid = min(int(amount // daily_amount), total_days - total_days_paid)
+            remaining_days = total_days - total_days_paid - days_paid
+        
+        # Pastikan tidak minus
+        return days_paid, max(0, remaining_days)
+    
+    def add_payments_bulk(self, payments):
+        """Posting banyak pembayaran sekaligus (setoran akhir keliling).
+        
+        `payments` berisi tuple (credit_id, amount) atau
+        (credit_id, amount, payment_date), diproses berurutan dengan logika
+        yang sama seperti add_payment. Semua masuk dalam satu transaksi
+        BEGIN IMMEDIATE: kredit dibaca sekali, lalu payments, ringkasan dan
+        status ditulis dengan executemany.
+        
+        Return dict:
+            'results'  - satu entri per pembayaran (format sama dengan hasil
+                         add_payment), None jika kredit tidak ditemukan
+            'credits'  - {credit_id: total akhir kredit}
+            'receipts' - data struk per pembayaran yang berhasil, siap
+                         dipakai sebagai Receipt(**data); receipt_number
+                         kosong sehingga nomor struk dibuat oleh Receipt
+        """
+        today = datetime.now().date()
+        entries = []
+        for payment in payments:
+            credit_id, amount = payment[0], payment[1]
+            # Tanggal dinormalisasi sekali (string ISO/date/datetime -> date)
+            payment_date = to_date(payment[2]) if len(payment) > 2 and payment[2] else today
+            entries.append((credit_id, amount, payment_date))
+        
+        results = []
+        receipts = []
+        
+        with self.connections.transaction(immediate=True) as cursor:
+            # Baca semua kredit yang terlibat sekaligus
+            state = {}
+            credit_ids = list({entry[0] for entry in entries})
+            for i in range(0, len(credit_ids), 500):
+                chunk = credit_ids[i:i + 500]
+                cursor.execute('''
+                    SELECT c.id, c.daily_amount, c.total_days, c.item_name, c.total_price,
+                           cust.name,
+                           s.credit_id IS NOT NULL,
+                           COALESCE(s.total_days_paid, 0),
+                           COALESCE(s.total_amount_paid, 0),
+                           COALESCE(s.payment_count, 0),
+                           s.last_payment_date
+                    FROM credits c
+                    JOIN customers cust ON cust.id = c.customer_id
+                    LEFT JOIN payment_summaries s ON s.credit_id = c.id
+                    WHERE c.id IN ({})
+                '''.format(','.join('?' * len(chunk))), chunk)
+                
+                for row in cursor.fetchall():
+                    state[row[0]] = {
+                        'daily_amount': row[1],
+                        'total_days': row[2],
+                        'item_name': row[3],
+                        'total_price': row[4],
+                        'customer_name': row[5],
+                        'has_summary': bool(row[6]),
+                        'total_days_paid': row[7],
+                        'total_amount_paid': row[8],
+                        'payment_count': row[9],
+                        'last_payment_date': row[10]
+                    }
+            
+            payment_rows = []
+            for credit_id, amount, payment_date in entries:
+                credit = state.get(credit_id)
+                if credit is None:
+                    results.append(None)
+                    continue
+                
+                date_str = payment_date.isoformat()
+                days_paid, remaining_days = self._compute_days_paid(
+                    amount, credit['daily_amount'], credit['total_days'],
+                    credit['total_days_paid'])
+                
+                credit['total_days_paid'] += days_paid
+                credit['total_amount_paid'] += amount
+                credit['payment_count'] += 1
+                credit['last_payment_date'] = max(credit['last_payment_date'] or date_str, date_str)
+                
+                payment_rows.append((credit_id, amount, date_str, days_paid, remaining_days))
+                
+                result = {
+                    'credit_id': credit_id,
+                    'customer_name': credit['customer_name'],
+                    'item_name': credit['item_name'],
+                    'total_price': credit['total_price'],
+                    'amount': amount,
+                    'payment_date': date_str,
+                    'days_paid': days_paid,
+                    'daily_amount': credit['daily_amount'],
+                    'total_days': credit['total_days'],
+                    'status': 'completed' if remaining_days == 0 else 'active'
+                }
+                result.update(self._summarize_payments(
+                    credit['total_days'], credit['daily_amount'],
+                    credit['total_days_paid'], credit['total_amount_paid'],
+                    credit['payment_count'], credit['last_payment_date']
+                ))
+                results.append(result)
+                
+                receipts.append({
+                    'receipt_number': '',
+                    'customer_name': credit['customer_name'],
+                    'item_name': credit['item_name'],
+                    'total_price': credit['total_price'],
+                    'total_days': credit['total_days'],
+                    'daily_amount': credit['daily_amount'],
+                    'days_paid': result['total_days_paid'],
+                    'remaining_days': result['remaining_days'],
+                    'payment_amount': amount,
+                    'status': "SUDAH",
+                    'date': payment_date
+                })
+            
+            cursor.executemany('''
+                INSERT INTO payments (credit_id, amount, payment_date, days_paid, remaining_days)
+                VALUES (?, ?, ?, ?, ?)
+            ''', payment_rows)
+            
+            # Lock tulis dipegang, jadi id AUTOINCREMENT batch ini berurutan
+            # (dipakai DashboardStats untuk mengenali event yang sudah dihitung)
+            cursor.execute('SELECT last_insert_rowid()')
+            payment_id = cursor.fetchone()[0] - len(payment_rows)
+            for result in results:
+                if result is not None:
+                    payment_id += 1
+                    result['payment_id'] = payment_id
+            
+            # Tulis total akhir per kredit (nilai absolut, lock sudah dipegang)
+            touched = {row[0] for row in payment_rows}
+            summary_rows = [
+                (state[cid]['total_days_paid'], state[cid]['total_amount_paid'],
+                 state[cid]['payment_count'], state[cid]['last_payment_date'], cid)
+                for cid in touched
+            ]
+            cursor.executemany('''
+                UPDATE payment_summaries
+                SET total_days_paid = ?, total_amount_paid = ?,
+                    payment_count = ?, last_payment_date = ?
+                WHERE credit_id = ?
+            ''', [row for row in summary_rows if state[row[4]]['has_summary']])
+            cursor.executemany('''
+                INSERT INTO payment_summaries
+                    (total_days_paid, total_amount_paid, payment_count, last_payment_date, credit_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [row for row in summary_rows if not state[row[4]]['has_summary']])
+            
+            # Update status kredit yang lunas
+            cursor.executemany(
+                'UPDATE credits SET status = ? WHERE id = ?',
+                [('completed', cid) for cid in touched
+                 if state[cid]['total_days_paid'] >= state[cid]['total_days']]
+            )
+        
+        for result in results:
+            if result is not None:
+                self.events.publish(PaymentPosted(result))
+        
+        credits = {}
+        for cid in {row[0] for row in payment_rows}:
+            credit = state[cid]
+            credits[cid] = self._summarize_payments(
+                credit['total_days'], credit['daily_amount'],
+                credit['total_days_paid'], credit['total_amount_paid'],
+                credit['payment_count'], credit['last_payment_date']
+            )
         
-        return True
+        return {'results': results, 'credits': credits, 'receipts': receipts}
     
     def get_payment_summary(self, credit_id):
         """Ambil ringkasan pembayaran untuk kredit"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.connections.cursor()
         
         cursor.execute('''
-            SELECT 
-                COALESCE(SUM(days_paid), 0) as total_days_paid,
-                COALESCE(SUM(amount), 0) as total_amount_paid,
-                COUNT(*) as payment_count,
-                MAX(payment_date) as last_payment_date
-            FROM payments 
-            WHERE credit_id = ?
+            SELECT c.total_days, c.daily_amount,
+                   COALESCE(s.total_days_paid, 0),
+                   COALESCE(s.total_amount_paid, 0),
+                   COALESCE(s.payment_count, 0),
+                   s.last_payment_date
+            FROM credits c
+            LEFT JOIN payment_summaries s ON s.credit_id = c.id
+            WHERE c.id = ?
         ''', (credit_id,))
         
-        result = cursor.fetchone()
-        
-        # Ambil info kredit
-        cursor.execute('SELECT total_days, daily_amount FROM credits WHERE id = ?', (credit_id,))
-        credit_info = cursor.fetchone()
-        
-        conn.close()
+        row = cursor.fetchone()
         
-        if result and credit_info:
-            total_days_paid = result[0]
-            total_amount_paid = result[1]
-            payment_count = result[2]
-            last_payment_date = result[3]
-            
-            total_days = credit_info[0]
-            daily_amount = credit_info[1]
-            
-            remaining_days = max(0, total_days - total_days_paid)
-            remaining_amount = remaining_days * daily_amount
-            
-            return {
-                'total_days_paid': total_days_paid,
-                'remaining_days': remaining_days,
-                'total_amount_paid': total_amount_paid,
-                'remaining_amount': remaining_amount,
-                'payment_count': payment_count,
-                'last_payment_date': last_payment_date,
-                'is_completed': remaining_days == 0
-            }
+        if row:
+            return self._summarize_payments(*row)
         
         return {
             'total_days_paid': 0,
-            'remaining_days': credit_info[0] if credit_info else 0,
+            'remaining_days': 0,
             'total_amount_paid': 0,
-            'remaining_amount': credit_info[0] * credit_info[1] if credit_info else 0,
+            'remaining_amount': 0,
             'payment_count': 0,
             'last_payment_date': None,
             'is_completed': False
         }
     
+    def _apply_to_summary(self, cursor, credit_id, days_paid, amount, payment_date):
+        """Tambahkan satu pembayaran ke ringkasan kredit (dalam transaksi pemanggil)"""
+        cursor.execute('''
+            UPDATE payment_summaries
+            SET total_days_paid = total_days_paid + ?,
+                total_amount_paid = total_amount_paid + ?,
+                payment_count = payment_count + 1,
+                last_payment_date = MAX(COALESCE(last_payment_date, ?), ?)
+            WHERE credit_id = ?
+        ''', (days_paid, amount, payment_date, payment_date, credit_id))
+        
+        if cursor.rowcount == 0:
+            cursor.execute('''
+                INSERT INTO payment_summaries
+                    (credit_id, total_days_paid, total_amount_paid, payment_count, last_payment_date)
+                VALUES (?, ?, ?, 1, ?)
+            ''', (credit_id, days_paid, amount, payment_date))
+    
+    def _rebuild_summaries(self, cursor):
+        """Hitung ulang seluruh payment_summaries dari tabel payments"""
+        for sql in REBUILD_SUMMARIES_SQL:
+            cursor.execute(sql)
+    
+    def rebuild_summaries(self):
+        """Maintenance: bangun ulang ringkasan pembayaran semua kredit"""
+        with self.connections.transaction() as cursor:
+            self._rebuild_summaries(cursor)
+        self.events.publish(DataReloaded('rebuild_summaries'))
+    
+    def get_dashboard_stats(self):
+        """Statistik dashboard dari penghitung di memori (tanpa query,
+        kecuali hitung ulang saat ganti hari)"""
+        return self.stats.snapshot()
+    
+    def check_summaries(self):
+        """Bandingkan ringkasan tersimpan dengan data mentah payments.
+        
+        Mengembalikan list kredit yang tidak konsisten (kosong jika semua cocok).
+        """
+        cursor = self.connections.cursor()
+        
+        cursor.execute('''
+            SELECT c.id,
+                   s.total_days_paid, s.total_amount_paid, s.payment_count, s.last_payment_date,
+                   COALESCE(SUM(p.days_paid), 0), COALESCE(SUM(p.amount), 0),
+                   COUNT(p.id), MAX(p.payment_date)
+            FROM credits c
+            LEFT JOIN payment_summaries s ON s.credit_id = c.id
+            LEFT JOIN payments p ON p.credit_id = c.id
+            GROUP BY c.id
+        ''')
+        
+        mismatches = []
+        for row in cursor.fetchall():
+            stored = row[1:5]
+            actual = row[5:9]
+            if (stored[0] != actual[0] or stored[2] != actual[2]
+                    or stored[3] != actual[3]
+                    or stored[1] is None or abs(stored[1] - actual[1]) > 0.005):
+                mismatches.append({
+                    'credit_id': row[0],
+                    'stored': dict(zip(('total_days_paid', 'total_amount_paid',
+                                        'payment_count', 'last_payment_date'), stored)),
+                    'actual': dict(zip(('total_days_paid', 'total_amount_paid',
+                                        'payment_count', 'last_payment_date'), actual))
+                })
+        
+        return mismatches
+    
+    def _summarize_payments(self, total_days, daily_amount, total_days_paid,
+                            total_amount_paid, payment_count, last_payment_date):
+        """Susun dict ringkasan pembayaran dari total agregat"""
+        remaining_days = max(0, total_days - total_days_paid)
+        remaining_amount = remaining_days * daily_amount
+        
+        return {
+            'total_days_paid': total_days_paid,
+            'remaining_days': remaining_days,
+            'total_amount_paid': total_amount_paid,
+            'remaining_amount': remaining_amount,
+            'payment_count': payment_count,
+            'last_payment_date': last_payment_date,
+            'is_completed': remaining_days == 0
+        }
+    
     def get_today_collections(self):
-        """Ambil daftar tagihan hari ini"""
+        """Ambil daftar tagihan hari ini (belum bayar di urutan atas)"""
         today = datetime.now().date()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.connections.cursor()
         
-        # Ambil semua kredit aktif
+        # Satu query untuk semua kredit aktif: total hari terbayar dari
+        # payment_summaries, status bayar hari ini lewat indeks payments,
+        # yang sudah lunas disaring di SQL
         cursor.execute('''
-            SELECT c.*, cust.name as customer_name
+            SELECT c.id, cust.name as customer_name, c.daily_amount, c.item_name,
+                   c.total_days,
+                   COALESCE(s.total_days_paid, 0) as total_days_paid,
+                   EXISTS (
+                       SELECT 1 FROM payments p
+                       WHERE p.credit_id = c.id AND p.payment_date = ?
+                   ) as paid_today
             FROM credits c
             JOIN customers cust ON c.customer_id = cust.id
+            LEFT JOIN payment_summaries s ON s.credit_id = c.id
             WHERE c.status = 'active'
-        ''')
+              AND c.total_days - COALESCE(s.total_days_paid, 0) > 0
+            ORDER BY paid_today, cust.name, c.id
+        ''', (today.isoformat(),))
         
         collections = []
         for row in cursor.fetchall():
-            credit_id = row[0]
-            customer_name = row[11]
-            daily_amount = row[4]
-            
-            # Cek apakah sudah bayar hari ini
-            cursor.execute('''
-                SELECT COUNT(*) FROM payments 
-                WHERE credit_id = ? AND payment_date = ?
-            ''', (credit_id, today))
-            
-            paid_today = cursor.fetchone()[0] > 0
-            
-            # Ambil ringkasan pembayaran
-            payment_info = self.get_payment_summary(credit_id)
-            
-            # Skip jika sudah lunas
-            if payment_info['is_completed']:
-                continue
-            
             collections.append({
-                'credit_id': credit_id,
-                'customer_name': customer_name,
-                'daily_amount': daily_amount,
-                'paid_today': paid_today,
-                'total_days_paid': payment_info['total_days_paid'],
-                'remaining_days': payment_info['remaining_days'],
-                'item_name': row[2]
+                'credit_id': row[0],
+                'customer_name': row[1],
+                'daily_amount': row[2],
+                'paid_today': bool(row[6]),
+                'total_days_paid': row[5],
+                'remaining_days': row[4] - row[5],
+                'item_name': row[3]
             })
         
-        conn.close()
         return collections
     
+    # === PAGINATION (keyset) ===
+    #
+    # Halaman berikutnya diambil dengan after_id = id record terakhir dari
+    # halaman sebelumnya (WHERE id > ? LIMIT ?), sehingga biayanya tetap
+    # walau data sudah puluhan ribu baris, tanpa OFFSET yang makin lambat.
+    
+    def get_customers_page(self, after_id=None, limit=100):
+        """Satu halaman pelanggan, urut id"""
+        cursor = self.connections.cursor()
+        
+        cursor.execute(
+            'SELECT * FROM customers WHERE id > ? ORDER BY id LIMIT ?',
+            (after_id or 0, limit)
+        )
+        
+        return [self._customer_from_row(row) for row in cursor.fetchall()]
+    
+    def get_credits_page(self, status='active', customer_id=None, after_id=None,
+                         limit=100, newest_first=True):
+        """Satu halaman kredit beserta ringkasan pembayaran.
+        
+        Urut id (terbaru dulu jika `newest_first`, sama seperti get_credits);
+        `status=None` berarti semua status.
+        """
+        cursor = self.connections.cursor()
+        
+        conditions = []
+        params = []
+        if status is not None:
+            conditions.append('c.status = ?')
+            params.append(status)
+        if customer_id:
+            conditions.append('c.customer_id = ?')
+            params.append(customer_id)
+        if after_id is not None:
+            conditions.append('c.id < ?' if newest_first else 'c.id > ?')
+            params.append(after_id)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        cursor.execute(f'''
+            {CREDIT_SELECT}
+            {where}
+            ORDER BY c.id {'DESC' if newest_first else 'ASC'}
+            LIMIT ?
+        ''', params + [limit])
+        
+        return [self._credit_from_row(row) for row in cursor.fetchall()]
+    
+    def get_credits_sorted_page(self, sort_by='id', descending=False, after=None,
+                                status='active', limit=100):
+        """Satu halaman kredit urut kolom `sort_by` (lihat CREDIT_SORT_COLUMNS).
+        
+        Keyset pada (nilai kolom, id): halaman berikutnya diambil dengan
+        after=(record[sort_by], record['id']) dari record terakhir halaman
+        sebelumnya. `status=None` berarti semua status.
+        """
+        if sort_by not in CREDIT_SORT_COLUMNS:
+            raise ValueError(f"Kolom urut tidak dikenal: {sort_by}")
+        
+        column = CREDIT_SORT_COLUMNS[sort_by]
+        direction = 'DESC' if descending else 'ASC'
+        
+        conditions = []
+        params = []
+        if status is not None:
+            conditions.append('c.status = ?')
+            params.append(status)
+        if after is not None:
+            conditions.append(f"({column}, c.id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        cursor = self.connections.cursor()
+        cursor.execute(f'''
+            {CREDIT_SELECT}
+            {where}
+            ORDER BY {column} {direction}, c.id {direction}
+            LIMIT ?
+        ''', params + [limit])
+        
+        return [self._credit_from_row(row) for row in cursor.fetchall()]
+    
+    def get_payments_page(self, credit_id=None, after_id=None, limit=500):
+        """Satu halaman pembayaran, urut id (urutan input)"""
+        cursor = self.connections.cursor()
+        
+        if credit_id is None:
+            cursor.execute(
+                'SELECT * FROM payments WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id or 0, limit)
+            )
+        else:
+            cursor.execute(
+                'SELECT * FROM payments WHERE credit_id = ? AND id > ? ORDER BY id LIMIT ?',
+                (credit_id, after_id or 0, limit)
+            )
+        
+        return [self._payment_from_row(row) for row in cursor.fetchall()]
+    
+    def _payment_from_row(self, row):
+        """Susun record pembayaran dari baris tabel payments"""
+        return self._record({
+            'id': row[0],
+            'credit_id': row[1],
+            'amount': row[2],
+            'payment_date': row[3],
+            'days_paid': row[4],
+            'remaining_days': row[5],
+            'notes': row[6],
+            'created_at': row[7]
+        }, row[8])
+    
+    def iter_customers(self, batch_size=500):
+        """Generator semua pelanggan, diambil per halaman"""
+        return self._iter_pages(
+            lambda after_id: self.get_customers_page(after_id, batch_size), batch_size)
+    
+    def iter_credits(self, status='active', customer_id=None, batch_size=500, newest_first=True):
+        """Generator kredit (beserta ringkasan), diambil per halaman"""
+        return self._iter_pages(
+            lambda after_id: self.get_credits_page(
+                status, customer_id, after_id, batch_size, newest_first),
+            batch_size)
+    
+    def iter_payments(self, credit_id=None, batch_size=1000):
+        """Generator pembayaran, diambil per halaman"""
+        return self._iter_pages(
+            lambda after_id: self.get_payments_page(credit_id, after_id, batch_size),
+            batch_size)
+    
+    def _iter_pages(self, fetch_page, batch_size):
+        """Ulangi fetch_page(after_id) sampai halaman terakhir"""
+        after_id = None
+        while True:
+            page = fetch_page(after_id)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after_id = page[-1]['id']
+    
+    # === PAYMENT LEDGER ===
+    
+    def iter_credit_ledger(self, credit_id, batch_size=500):
+        """Riwayat pembayaran satu kredit urut input, dengan total berjalan.
+        
+        Setiap record berisi kolom payments (remaining_days = sisa hari
+        setelah pembayaran itu, seperti tersimpan) ditambah
+        running_days_paid dan running_amount_paid.
+        """
+        running_days = 0
+        running_amount = 0
+        for payment in self.iter_payments(credit_id, batch_size):
+            running_days += payment['days_paid'] or 0
+            running_amount += payment['amount']
+            payment['running_days_paid'] = running_days
+            payment['running_amount_paid'] = running_amount
+            yield payment
+    
+    def iter_payments_between(self, start_date, end_date, batch_size=1000):
+        """Pembayaran dalam rentang tanggal inklusif, urut tanggal lalu input.
+        
+        Record berisi kolom payments ditambah customer_name, item_name dan
+        daily_amount. Dibaca per halaman lewat idx_payments_date dengan
+        keyset (payment_date, id).
+        """
+        cursor = self.connections.cursor()
+        start_date, end_date = str(start_date), str(end_date)
+        last_date, last_id = start_date, 0
+        
+        while True:
+            cursor.execute('''
+                SELECT p.id, p.credit_id, p.amount, p.payment_date, p.days_paid,
+                       p.remaining_days, p.notes, p.created_at, p.data_encrypted,
+                       cust.name, c.item_name, c.daily_amount
+                FROM payments p
+                JOIN credits c ON c.id = p.credit_id
+                JOIN customers cust ON cust.id = c.customer_id
+                WHERE p.payment_date BETWEEN ? AND ?
+                  AND (p.payment_date > ? OR p.id > ?)
+                ORDER BY p.payment_date, p.id
+                LIMIT ?
+            ''', (last_date, end_date, last_date, last_id, batch_size))
+            rows = cursor.fetchall()
+            
+            for row in rows:
+                payment = self._payment_from_row(row)
+                payment.update({
+                    'customer_name': row[9],
+                    'item_name': row[10],
+                    'daily_amount': row[11]
+                })
+                yield payment
+            
+            if len(rows) < batch_size:
+                return
+            last_date, last_id = rows[-1][3], rows[-1][0]
+    
+    def get_payments_on(self, day=None):
+        """Semua pembayaran pada satu hari (setoran penagih), urut input"""
+        if day is None:
+            day = datetime.now().date()
+        return list(self.iter_payments_between(day, day))
+    
     # === HOLIDAY OPERATIONS ===
     
     def mark_holiday(self, holiday_date=None):
-        """Tandai hari libur"""
+        """Tandai hari libur.
+        
+        Hanya menambah satu baris; jatuh tempo kredit dihitung dari kalender
+        libur saat dibaca, jadi tidak ada kredit yang perlu ditulis ulang.
+        """
         if holiday_date is None:
             holiday_date = datetime.now().date()
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('INSERT INTO holidays (holiday_date) VALUES (?)', (holiday_date,))
-            conn.commit()
+            with self.connections.transaction() as cursor:
+                cursor.execute('INSERT INTO holidays (holiday_date) VALUES (?)', (holiday_date,))
             
-            # Mundurkan jatuh tempo semua kredit aktif
-            cursor.execute('''
-                UPDATE credits 
-                SET end_date = date(end_date, '+1 day')
-                WHERE status = 'active'
-            ''')
-            
-            conn.commit()
-            conn.close()
+            self._invalidate_holidays()
+            day = to_date(holiday_date)
+            self.events.publish(HolidayMarked(day, day))
             return True
         except sqlite3.IntegrityError:
             # Sudah ada holiday untuk tanggal ini
-            conn.close()
             return False
     
-    def is_holiday(self, date):
-        """Cek apakah tanggal adalah hari libur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM holidays WHERE holiday_date = ?', (date,))
-        result = cursor.fetchone()[0] > 0
+    def mark_holiday_range(self, start_date, end_date):
+        """Tandai rentang hari libur (inklusif), mis. libur Lebaran.
+        
+        Tanggal boleh date/datetime atau string ISO (seperti mark_holiday).
+        Tanggal yang sudah libur dilewati. Return jumlah hari libur baru;
+        ValueError jika end_date sebelum start_date.
+        """
+        start_date = to_date(start_date)
+        end_date = to_date(end_date)
+        if end_date < start_date:
+            raise ValueError(f"Tanggal akhir libur ({end_date}) sebelum tanggal mulai ({start_date})")
+        
+        days = (end_date - start_date).days + 1
+        with self.connections.transaction() as cursor:
+            cursor.executemany(
+                'INSERT OR IGNORE INTO holidays (holiday_date) VALUES (?)',
+                [((start_date + timedelta(days=i)).isoformat(),) for i in range(days)]
+            )
+            added = cursor.rowcount
         
-        conn.close()
-        return result
+        self._invalidate_holidays()
+        if added:
+            self.events.publish(HolidayMarked(start_date, end_date))
+        return added
+    
+    def is_holiday(self, date):
+        """Cek apakah tanggal adalah hari libur (O(1), dari kalender di memori)"""
+        return self.holiday_calendar().is_holiday(date)
+    
+    def holiday_calendar(self):
+        """Kalender libur di memori; dimuat sekali, dibuat ulang setelah
+        mark_holiday/import/restore"""
+        calendar = self._holiday_calendar
+        if calendar is None:
+            generation = self._holiday_generation
+            cursor = self.connections.cursor()
+            cursor.execute('SELECT holiday_date FROM holidays')
+            calendar = HolidayCalendar(row[0] for row in cursor.fetchall())
+            
+            # Jangan simpan jika cache dibuang selama memuat: data yang
+            # terbaca mungkin sudah basi (libur baru commit setelah SELECT)
+            with self._holiday_lock:
+                if self._holiday_generation == generation:
+                    self._holiday_calendar = calendar
+        return calendar
+    
+    def _invalidate_holidays(self):
+        """Buang cache kalender libur (setelah libur ditambah/di-restore)"""
+        with self._holiday_lock:
+            self._holiday_generation += 1
+            self._holiday_calendar = None
+    
+    def due_date(self, start_date, total_days):
+        """Jatuh tempo efektif kredit (O(log H), lihat HolidayCalendar.due_date)"""
+        return self.holiday_calendar().due_date(start_date, total_days)
+    
+    def business_days_between(self, start_date, end_date):
+        """Jumlah hari kerja dalam rentang inklusif [start_date, end_date]"""
+        return self.holiday_calendar().business_days_between(start_date, end_date)
+    
+    def data_reloaded(self, reason):
+        """Data diganti langsung di database (import, restore backup).
+        
+        Dipanggil SETELAH commit: buang cache kalender libur lalu terbitkan
+        satu DataReloaded (statistik & layar memuat ulang dari data baru).
+        """
+        self._invalidate_holidays()
+        self.events.publish(DataReloaded(reason))
+    
+    def rebuild_end_dates(self):
+        """Maintenance: kembalikan end_date ke jatuh tempo dasar (setelah restore
+        data lama yang end_date-nya sudah dimundurkan) dan muat ulang kalender libur"""
+        with self.connections.transaction() as cursor:
+            cursor.execute(RESET_END_DATES_SQL)
+        self._invalidate_holidays()
+        self.events.publish(DataReloaded('rebuild_end_dates'))
     
     # === BACKUP OPERATIONS ===
     
     def log_backup(self, backup_type, backup_path, status):
         """Log backup activity"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO backup_log (backup_type, backup_path, status)
-            VALUES (?, ?, ?)
-        ''', (backup_type, backup_path, status))
-        
-        conn.commit()
-        conn.close()
+        with self.connections.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO backup_log (backup_type, backup_path, status)
+                VALUES (?, ?, ?)
+            ''', (backup_type, backup_path, status))
     
     def get_last_backup(self):
         """Ambil info backup terakhir"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self.connections.cursor()
         
         cursor.execute('''
             SELECT * FROM backup_log 
@@ -542,7 +1783,6 @@ class DatabaseManager:
         ''')
         
         result = cursor.fetchone()
-        conn.close()
         
         if result:
             return {
@@ -556,60 +1796,70 @@ class DatabaseManager:
     
     def export_data(self):
         """Export semua data untuk backup"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Export semua tabel
         data = {}
         
+        for table, columns, rows in self.iter_export():
+            if table not in data:
+                data[table] = {'columns': columns, 'rows': []}
+            data[table]['rows'].extend(rows)
+        
+        return data
+    
+    def iter_export(self, batch_size=1000):
+        """Export bertahap: yield (tabel, kolom, list baris) per batch.
+        
+        Setiap tabel dibaca dengan satu cursor (snapshot konsisten) tetapi
+        hanya `batch_size` baris yang ada di memori sekaligus.
+        """
+        conn = self.connections.connection()
+        
         tables = ['customers', 'credits', 'payments', 'holidays', 'backup_log']
         
         for table in tables:
             cursor = conn.cursor()
-            cursor.execute(f'SELECT * FROM {table}')
+            cursor.execute(f'SELECT * FROM {table} ORDER BY rowid')
             
             columns = [description[0] for description in cursor.description]
-            rows = cursor.fetchall()
+            rows = cursor.fetchmany(batch_size)
             
-            data[table] = {
-                'columns': columns,
-                'rows': rows
-            }
-        
-        conn.close()
-        return data
+            # Tabel kosong tetap dikirim sekali agar kolomnya ikut ter-export
+            yield table, columns, rows
+            
+            while len(rows) == batch_size:
+                rows = cursor.fetchmany(batch_size)
+                if rows:
+                    yield table, columns, rows
     
     def import_data(self, data):
         """Import data dari backup"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Clear existing data
-            cursor.execute('DELETE FROM payments')
-            cursor.execute('DELETE FROM credits')
-            cursor.execute('DELETE FROM customers')
-            cursor.execute('DELETE FROM holidays')
-            
-            # Import data
-            for table, table_data in data.items():
-                if table == 'backup_log':
-                    continue  # Skip backup log
+            with self.connections.transaction() as cursor:
+                # Clear existing data
+                cursor.execute('DELETE FROM payments')
+                cursor.execute('DELETE FROM credits')
+                cursor.execute('DELETE FROM customers')
+                cursor.execute('DELETE FROM holidays')
                 
-                columns = table_data['columns']
-                rows = table_data['rows']
+                # Import data
+                for table, table_data in data.items():
+                    if table == 'backup_log':
+                        continue  # Skip backup log
+                    
+                    columns = table_data['columns']
+                    rows = table_data['rows']
+                    
+                    placeholders = ','.join(['?' for _ in columns])
+                    
+                    cursor.executemany(
+                        f'INSERT INTO {table} ({",".join(columns)}) VALUES ({placeholders})',
+                        rows
+                    )
                 
-                placeholders = ','.join(['?' for _ in columns])
-                
-                cursor.executemany(
-                    f'INSERT INTO {table} ({",".join(columns)}) VALUES ({placeholders})',
-                    rows
-                )
+                self._rebuild_summaries(cursor)
+                cursor.execute(RESET_END_DATES_SQL)
             
-            conn.commit()
-            conn.close()
+            self.data_reloaded('import')
             return True
             
         except Exception as e:
-            conn.rollback()
-            conn.close()
             return False
\ No newline at end of file
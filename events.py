@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Event Bus untuk Toko Kredit Syariah
+DatabaseManager menerbitkan event perubahan data setelah transaksi commit;
+layanan dan layar berlangganan lalu menerapkan perubahannya saja (delta)
+alih-alih query ulang semua data
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+
+# === EVENT ===
+
+@dataclass(frozen=True)
+class CustomerAdded:
+    """Pelanggan baru disimpan"""
+    customer_id: int
+    name: str
+    phone: str = ""
+
+
+@dataclass(frozen=True)
+class CreditAdded:
+    """Kredit baru disimpan (status aktif, belum ada pembayaran)"""
+    credit_id: int
+    customer_id: int
+    customer_name: str
+    item_name: str
+    total_price: float
+    daily_amount: float
+    total_days: int
+    start_date: Optional[date] = None
+
+
+@dataclass(frozen=True)
+class PaymentPosted:
+    """Pembayaran tercatat; `result` adalah dict hasil add_payment
+    (total terbaru kredit setelah pembayaran ini)"""
+    result: dict
+
+    @property
+    def credit_id(self):
+        return self.result['credit_id']
+
+    @property
+    def payment_date(self):
+        return self.result['payment_date']
+
+
+@dataclass(frozen=True)
+class HolidayMarked:
+    """Hari libur ditambah untuk rentang inklusif [start_date, end_date]"""
+    start_date: date
+    end_date: date
+
+    def covers(self, day):
+        return self.start_date <= day <= self.end_date
+
+
+@dataclass(frozen=True)
+class DataReloaded:
+    """Data diganti/dibangun ulang (import, restore, maintenance);
+    penerima harus memuat ulang semua, delta tidak berlaku"""
+    reason: str = ""
+
+
+# === BUS ===
+
+class EventBus:
+    """Observer sederhana yang aman dipakai dari banyak thread.
+
+    Handler dipanggil langsung di thread penerbit (biasanya thread yang
+    menulis ke database). Untuk UI Kivy gunakan MainThreadDispatcher.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []  # (handler, tuple tipe event atau None = semua)
+
+    def subscribe(self, handler, *event_types):
+        """Daftarkan handler(event) untuk tipe event tertentu (semua jika kosong)"""
+        with self._lock:
+            self._subscribers = self._subscribers + [(handler, event_types or None)]
+        return handler
+
+    def unsubscribe(self, handler):
+        """Hapus handler; tidak apa-apa jika belum terdaftar"""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[0] != handler]
+
+    def publish(self, event):
+        """Kirim event ke semua pelanggan yang cocok.
+
+        Kesalahan di satu handler tidak menggagalkan penerbit (data sudah
+        tersimpan) maupun handler lainnya.
+        """
+        for handler, event_types in self._subscribers:
+            if event_types is not None and not isinstance(event, event_types):
+                continue
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"Event handler error ({type(event).__name__}): {str(e)}")
+
+
+class MainThreadDispatcher:
+    """Antar event dari EventBus ke main thread Kivy, per batch.
+
+    Event dari thread mana pun dikumpulkan, lalu dikirim sekali per frame
+    lewat Clock.schedule_once sebagai list ke handler(events). Tidak ada
+    event berarti tidak ada jadwal Clock sama sekali.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+        self._handlers = []  # (handler, tuple tipe event atau None)
+        bus.subscribe(self._enqueue)
+
+    def subscribe(self, handler, *event_types):
+        """Daftarkan handler(events) yang dipanggil di main thread"""
+        self._handlers = self._handlers + [(handler, event_types or None)]
+        return handler
+
+    def unsubscribe(self, handler):
+        self._handlers = [h for h in self._handlers if h[0] != handler]
+
+    def close(self):
+        """Lepas dari bus (event yang tertunda dibuang)"""
+        self.bus.unsubscribe(self._enqueue)
+        with self._lock:
+            self._pending = []
+
+    def _enqueue(self, event):
+        with self._lock:
+            self._pending.append(event)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        # Import di sini agar modul ini tetap bisa dipakai tanpa Kivy
+        from kivy.clock import Clock
+        Clock.schedule_once(self.flush, 0)
+
+    def flush(self, dt=None):
+        """Kirim semua event tertunda (dipanggil Clock di main thread)"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._scheduled = False
+
+        if not events:
+            return
+
+        for handler, event_types in self._handlers:
+            batch = events if event_types is None else [
+                e for e in events if isinstance(e, event_types)
+            ]
+            if not batch:
+                continue
+            try:
+                handler(batch)
+            except Exception as e:
+                print(f"Event handler error: {str(e)}")
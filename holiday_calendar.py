@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kalender Hari Libur untuk Toko Kredit Syariah
+Snapshot hari libur di memori: ordinal terurut untuk hitung rentang
+(bisect, O(log n)) dan set untuk cek satu tanggal (O(1))
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+
+def to_date(value):
+    """Tanggal dari kolom DATE (string ISO) atau objek date/datetime"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class HolidayCalendar:
+    """Daftar hari libur yang tidak berubah setelah dibuat.
+
+    DatabaseManager membuat ulang kalender setelah hari libur ditambah
+    atau data di-restore, jadi objek ini aman dibaca dari thread mana pun.
+    """
+
+    def __init__(self, dates=()):
+        self._ordinals = sorted({to_date(d).toordinal() for d in dates})
+        self._lookup = frozenset(self._ordinals)
+
+    @property
+    def ordinals(self):
+        """Ordinal (date.toordinal) semua hari libur, terurut"""
+        return self._ordinals
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __contains__(self, day):
+        return self.is_holiday(day)
+
+    def is_holiday(self, day):
+        """Cek apakah tanggal adalah hari libur (O(1))"""
+        return to_date(day).toordinal() in self._lookup
+
+    def count_between(self, start_date, end_date):
+        """Jumlah hari libur dalam rentang inklusif [start_date, end_date]"""
+        start = to_date(start_date).toordinal()
+        end = to_date(end_date).toordinal()
+        if end < start:
+            return 0
+        return bisect_right(self._ordinals, end) - bisect_left(self._ordinals, start)
+
+    def business_days_between(self, start_date, end_date):
+        """Jumlah hari kerja (bukan libur) dalam rentang inklusif
+        [start_date, end_date]; 0 jika end_date sebelum start_date"""
+        start = to_date(start_date).toordinal()
+        end = to_date(end_date).toordinal()
+        if end < start:
+            return 0
+        return (end - start + 1) - self.count_between(start_date, end_date)
+
+    def holidays_between(self, start_date, end_date):
+        """Daftar tanggal libur dalam rentang inklusif, terurut"""
+        low = bisect_left(self._ordinals, to_date(start_date).toordinal())
+        high = bisect_right(self._ordinals, to_date(end_date).toordinal())
+        return [date.fromordinal(o) for o in self._ordinals[low:high]]
+
+    def due_date(self, start_date, total_days):
+        """Jatuh tempo efektif: start_date + total_days, mundur satu hari
+        untuk setiap hari libur di antara start_date dan jatuh tempo.
+
+        Rentang diperpanjang sampai stabil karena hari yang ditambahkan
+        bisa jatuh pada libur berikutnya.
+        """
+        ordinals = self._ordinals
+        start = to_date(start_date).toordinal()
+        base = start + total_days
+        low = bisect_left(ordinals, start)
+
+        end = base
+        while True:
+            shifted = base + bisect_right(ordinals, end) - low
+            if shifted == end:
+                return date.fromordinal(end)
+            end = shifted
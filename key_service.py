@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Key Derivation Service untuk Toko Kredit Syariah
+PBKDF2 cukup dijalankan sekali per sesi; kunci dipakai bersama oleh
+DatabaseManager dan BackupManager
+"""
+
+import base64
+import hashlib
+import threading
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+# Salt tetap untuk konsistensi (dalam produksi, gunakan salt random yang disimpan)
+DB_SALT = b'toko_kredit_syariah_salt_2025'
+# Salt lama BackupManager, hanya dipakai untuk membuka backup versi lama
+LEGACY_BACKUP_SALT = b'kredit_syariah_salt_2025'
+PBKDF2_ITERATIONS = 100000
+
+# Plaintext penanda untuk key-check value yang disimpan di database
+KEY_CHECK_PLAINTEXT = b'toko_kredit_syariah_key_check'
+
+
+class InvalidPasswordError(ValueError):
+    """Kata sandi tidak cocok dengan database"""
+
+
+class KeyDerivationService:
+    """Derive dan cache kunci Fernet per sesi"""
+
+    def __init__(self):
+        self._keys = {}  # (salt, sha256(password)) -> key
+        self._lock = threading.Lock()
+
+    def derive(self, password, salt=DB_SALT):
+        """Derive kunci dengan PBKDF2-HMAC-SHA256, hasil di-cache per sesi"""
+        cache_key = (salt, hashlib.sha256(password.encode()).digest())
+
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is None:
+                kdf = PBKDF2HMAC(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=salt,
+                    iterations=PBKDF2_ITERATIONS,
+                )
+                key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+                self._keys[cache_key] = key
+
+        return key
+
+    def master_key(self, password):
+        """Kunci utama (dipakai untuk enkripsi kolom database)"""
+        return self.derive(password, DB_SALT)
+
+    def backup_key(self, password):
+        """Kunci backup, diturunkan murah dari kunci utama lewat HKDF"""
+        master = base64.urlsafe_b64decode(self.master_key(password))
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'toko_kredit_syariah_backup',
+        )
+        return base64.urlsafe_b64encode(hkdf.derive(master))
+
+    def legacy_backup_key(self, password):
+        """Kunci backup lama (PBKDF2 terpisah), hanya untuk restore backup lama"""
+        return self.derive(password, LEGACY_BACKUP_SALT)
+
+    def clear(self):
+        """Hapus semua kunci dari cache (mis. saat logout)"""
+        with self._lock:
+            self._keys.clear()
+
+
+def make_key_check(key):
+    """Buat key-check value terenkripsi untuk disimpan di database"""
+    return Fernet(key).encrypt(KEY_CHECK_PLAINTEXT).decode()
+
+
+def verify_key_check(key, token):
+    """Cek apakah kunci cocok dengan key-check value tersimpan"""
+    try:
+        return Fernet(key).decrypt(token.encode()) == KEY_CHECK_PLAINTEXT
+    except (InvalidToken, ValueError):
+        return False
+
+
+# Global key service instance
+key_service = KeyDerivationService()
+
+
+def get_key_service():
+    """Get global key derivation service"""
+    return key_service
@@ -20,11 +20,16 @@ from kivy.clock import Clock
 
 # Import modules
 from database import DatabaseManager
+from async_db import AsyncDatabase
+from key_service import InvalidPasswordError
 from printer import get_printer
 from backup import get_backup_manager
+from models import format_currency
+from events import MainThreadDispatcher, CreditAdded, PaymentPosted, HolidayMarked
 
 # Import screen classes
 from screens import (
+    LiveDataMixin,
     TambahPelangganScreen,
     JualKreditScreen,
     CatatBayarScreen,
@@ -263,13 +268,15 @@ class WizardScreen(Screen):
     def complete_setup(self):
         # Initialize database
         app = App.get_running_app()
-        app.initialize_app(self.password)
+        if not app.initialize_app(self.password):
+            self.show_error("Kata sandi salah atau database gagal dibuka")
+            return
         
         # Switch to dashboard
         app.root.current = 'dashboard'
 
 
-class DashboardScreen(Screen):
+class DashboardScreen(LiveDataMixin, Screen):
     """Main dashboard screen"""
     
     def __init__(self, **kwargs):
@@ -398,10 +405,28 @@ class DashboardScreen(Screen):
         self.add_widget(layout)
         
     
+    watched_events = (CreditAdded, PaymentPosted, HolidayMarked)
+    
     def on_enter(self):
         """Called when screen is entered"""
+        # Kartu statistik diperbarui oleh event; timer hanya untuk status
+        # backup dan pergantian hari
+        if not self.sync_data():
+            self.update_dashboard_info()
+        self.refresh_event = Clock.schedule_interval(self.update_dashboard_info, 30)
+    
+    def on_leave(self):
+        """Called when screen is left"""
+        if getattr(self, 'refresh_event', None):
+            self.refresh_event.cancel()
+            self.refresh_event = None
+    
+    def reload(self):
+        self.update_dashboard_info()
+    
+    def apply_events(self, events):
+        # Penghitung sudah diperbarui DashboardStats; cukup baca ulang
         self.update_dashboard_info()
-        Clock.schedule_interval(self.update_dashboard_info, 30)  # Update every 30 seconds
     
     def update_dashboard_info(self, dt=None):
         """Update dashboard information"""
@@ -411,7 +436,7 @@ class DashboardScreen(Screen):
             stats = app.db_manager.get_dashboard_stats()
             
             # Update cards
-            self.piutang_card.text = f"Total Piutang\n{stats['total_piutang']}"
+            self.piutang_card.text = f"Total Piutang\n{format_currency(stats['total_piutang'])}"
             self.tagihan_card.text = f"Tagihan Hari Ini\n{stats['tagihan_hari_ini']} orang"
             self.sudah_bayar_card.text = f"Sudah Bayar\n{stats['sudah_bayar']} orang"
             self.belum_bayar_card.text = f"Belum Bayar\n{stats['belum_bayar']} orang"
@@ -445,12 +470,14 @@ class DashboardScreen(Screen):
     def tandai_libur(self, instance):
         """Mark today as holiday"""
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            success = app.db_manager.mark_holiday()
-            if success:
-                self.show_success("Hari ini berhasil ditandai sebagai libur")
-            else:
-                self.show_error("Gagal menandai libur")
+        if hasattr(app, 'db_async'):
+            app.db_async.mark_holiday(callback=self.on_holiday_marked)
+    
+    def on_holiday_marked(self, success):
+        if success:
+            self.show_success("Hari ini berhasil ditandai sebagai libur")
+        else:
+            self.show_error("Gagal menandai libur")
     
     def show_success(self, message):
         popup = Popup(
@@ -494,21 +521,35 @@ class TokoKreditSyariahApp(App):
             db_path = os.path.join(self.user_data_dir, 'kredit.db')
             self.db_manager = DatabaseManager(db_path, password)
             
+            # Query layar berjalan di worker thread; event database diantar
+            # ke layar di main thread, per frame
+            self.db_async = AsyncDatabase(self.db_manager)
+            self.ui_events = MainThreadDispatcher(self.db_manager.events)
+            
             # Initialize printer
             self.printer = get_printer()
             
             # Initialize backup
             from backup import initialize_backup
-            self.backup_manager = initialize_backup(db_path, password)
+            self.backup_manager = initialize_backup(db_path, password, self.db_manager)
             self.backup_manager.start_auto_backup()
             
             print("App initialized successfully")
+            return True
             
+        except InvalidPasswordError:
+            print("App initialization failed: wrong password")
+            return False
         except Exception as e:
             print(f"App initialization failed: {str(e)}")
+            return False
     
     def on_stop(self):
         """Called when app is closing"""
+        if hasattr(self, 'db_async'):
+            # Selesaikan tulisan yang masih antre sebelum backup terakhir
+            self.db_async.shutdown(wait=True)
+        
         if hasattr(self, 'backup_manager'):
             # Create final backup
             self.backup_manager.create_backup()
@@ -516,6 +557,12 @@ class TokoKreditSyariahApp(App):
         
         if hasattr(self, 'printer'):
             self.printer.disconnect()
+        
+        if hasattr(self, 'ui_events'):
+            self.ui_events.close()
+        
+        if hasattr(self, 'db_manager'):
+            self.db_manager.close()
 
 
 if __name__ == '__main__':
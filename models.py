@@ -324,6 +324,49 @@ class Receipt:
         if not self.receipt_number:
             self.receipt_number = self.generate_receipt_number()
     
+    @classmethod
+    def from_payment(cls, result):
+        """Struk dari hasil posting add_payment/add_payments_bulk"""
+        return cls(
+            receipt_number="",
+            date=date.fromisoformat(str(result['payment_date'])[:10]),
+            customer_name=result['customer_name'],
+            item_name=result['item_name'],
+            total_price=result['total_price'],
+            total_days=result['total_days'],
+            daily_amount=result['daily_amount'],
+            days_paid=result['total_days_paid'],
+            remaining_days=result['remaining_days'],
+            payment_amount=result['amount'],
+            status="SUDAH"
+        )
+    
+    @classmethod
+    def from_last_payment(cls, credit):
+        """Struk cetak ulang untuk pembayaran terakhir dari get_credit(),
+        atau None jika kredit belum punya pembayaran"""
+        payment = credit.get('last_payment')
+        if not payment:
+            return None
+        
+        # Sisa hari dicatat per pembayaran; data lama tanpa nilai ini
+        # memakai ringkasan kredit saat ini
+        remaining_days = payment['remaining_days']
+        if remaining_days is None:
+            remaining_days = credit['remaining_days']
+        
+        return cls.from_payment({
+            'payment_date': payment['payment_date'],
+            'customer_name': credit['customer_name'],
+            'item_name': credit['item_name'],
+            'total_price': credit['total_price'],
+            'total_days': credit['total_days'],
+            'daily_amount': credit['daily_amount'],
+            'total_days_paid': credit['total_days'] - remaining_days,
+            'remaining_days': remaining_days,
+            'amount': payment['amount']
+        })
+    
     def generate_receipt_number(self):
         """Generate unique receipt number"""
         from datetime import datetime
@@ -11,14 +11,76 @@ from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from kivy.uix.popup import Popup
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.spinner import Spinner
 from kivy.metrics import dp
 from kivy.app import App
-from kivy.clock import Clock
 
 from models import Customer, Credit, Payment, DailyCollection, Receipt, format_currency
+from analytics import portfolio_report
+from widgets import CollectionListView, ReportTable, CustomerPicker, CreditPicker
+from events import CustomerAdded, CreditAdded, PaymentPosted, HolidayMarked, DataReloaded
 from datetime import datetime, date
+import os
+
+
+class LiveDataMixin:
+    """Sinkronkan layar dengan event database (app.ui_events).
+    
+    Data dimuat penuh (reload) sekali saat layar pertama kali dibuka.
+    Sesudahnya event yang datang saat layar tampil langsung diterapkan
+    lewat apply_events(events); saat layar tidak tampil event hanya
+    ditampung dan diterapkan ketika layar dibuka lagi. Layar yang tidak
+    tampil tidak melakukan query apa pun.
+    
+    Layar mengisi `watched_events`, mengimplementasikan reload() dan
+    apply_events(events), yang boleh mengembalikan False jika perlu reload.
+    """
+    
+    watched_events = ()
+    max_pending_events = 500  # lebih dari ini, reload lebih murah
+    
+    def sync_data(self):
+        """Panggil dari on_enter. Return True jika ada data yang diperbarui"""
+        app = App.get_running_app()
+        if not hasattr(app, 'ui_events'):
+            return False
+        
+        if not getattr(self, '_live_subscribed', False):
+            app.ui_events.subscribe(self._on_live_events, *self.watched_events, DataReloaded)
+            self._live_subscribed = True
+            self._pending_events = []
+            self.reload()
+            return True
+        
+        events, self._pending_events = self._pending_events, []
+        if events is None:
+            self.reload()
+            return True
+        if events:
+            self._apply_live_events(events)
+            return True
+        return False
+    
+    def _on_live_events(self, events):
+        """Handler MainThreadDispatcher (main thread, satu batch per frame)"""
+        if self.manager is not None and self.manager.current == self.name:
+            self._apply_live_events(events)
+        elif self._pending_events is not None:
+            self._pending_events.extend(events)
+            if len(self._pending_events) > self.max_pending_events:
+                self._pending_events = None  # tandai: reload saat dibuka
+    
+    def _apply_live_events(self, events):
+        if (len(events) > self.max_pending_events
+                or any(isinstance(e, DataReloaded) for e in events)
+                or self.apply_events(events) is False):
+            self.reload()
+    
+    def reload(self):
+        raise NotImplementedError
+    
+    def apply_events(self, events):
+        return False
+
 
 class TambahPelangganScreen(Screen):
     """Screen untuk menambah pelanggan baru"""
@@ -115,13 +177,13 @@ class TambahPelangganScreen(Screen):
         
         btn_layout.add_widget(Label())  # Spacer
         
-        save_btn = Button(
+        self.save_btn = Button(
             text='Simpan',
             size_hint_x=0.3,
             background_color=(0.2, 0.8, 0.2, 1),
             on_press=self.save_customer
         )
-        btn_layout.add_widget(save_btn)
+        btn_layout.add_widget(self.save_btn)
         
         layout.add_widget(btn_layout)
         self.add_widget(layout)
@@ -148,16 +210,32 @@ class TambahPelangganScreen(Screen):
             self.show_error("Batas kredit harus berupa angka")
             return
         
-        # Save to database
+        # Save to database (di worker thread)
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            customer_id = app.db_manager.add_customer(nama, alamat, hp, batas_kredit)
-            
-            if customer_id:
-                self.show_success(f"Pelanggan {nama} berhasil ditambahkan")
-                self.clear_form(None)
-            else:
-                self.show_error("Gagal menyimpan pelanggan")
+        if hasattr(app, 'db_async'):
+            self.set_saving(True)
+            app.db_async.add_customer(
+                nama, alamat, hp, batas_kredit,
+                callback=lambda customer_id: self.on_customer_saved(customer_id, nama),
+                error_callback=self.on_save_error
+            )
+    
+    def on_customer_saved(self, customer_id, nama):
+        self.set_saving(False)
+        if customer_id:
+            self.show_success(f"Pelanggan {nama} berhasil ditambahkan")
+            self.clear_form(None)
+        else:
+            self.show_error("Gagal menyimpan pelanggan")
+    
+    def on_save_error(self, error):
+        self.set_saving(False)
+        self.show_error(f"Gagal menyimpan pelanggan: {str(error)}")
+    
+    def set_saving(self, saving):
+        """Tampilkan status menyimpan dan cegah simpan ganda"""
+        self.save_btn.disabled = saving
+        self.save_btn.text = 'Menyimpan...' if saving else 'Simpan'
     
     def show_error(self, message):
         popup = Popup(
@@ -179,7 +257,7 @@ class TambahPelangganScreen(Screen):
         App.get_running_app().root.current = 'dashboard'
 
 
-class JualKreditScreen(Screen):
+class JualKreditScreen(LiveDataMixin, Screen):
     """Screen untuk jual kredit"""
     
     def __init__(self, **kwargs):
@@ -214,18 +292,22 @@ class JualKreditScreen(Screen):
         # Customer selection
         layout.add_widget(Label(text='Pilih Pelanggan:', size_hint_y=None, height=dp(30), halign='left'))
         
-        customer_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(10))
+        customer_layout = BoxLayout(size_hint_y=None, height=dp(200), spacing=dp(10))
         
-        self.customer_spinner = Spinner(
-            text='Pilih pelanggan...',
-            values=[],
+        # Cari sambil mengetik; hanya hasil teratas yang dimuat
+        self.customer_picker = CustomerPicker(
+            search=self.search_customers,
+            select_callback=self.on_customer_selected,
             size_hint_x=0.7
         )
-        customer_layout.add_widget(self.customer_spinner)
+        customer_layout.add_widget(self.customer_picker)
         
         add_customer_btn = Button(
             text='+ Baru',
             size_hint_x=0.3,
+            size_hint_y=None,
+            height=dp(50),
+            pos_hint={'top': 1},
             background_color=(0.2, 0.8, 0.2, 1),
             on_press=self.add_new_customer
         )
@@ -302,29 +384,38 @@ class JualKreditScreen(Screen):
         
         btn_layout.add_widget(Label())  # Spacer
         
-        save_btn = Button(
+        self.save_btn = Button(
             text='Simpan & Cetak',
             size_hint_x=0.4,
             background_color=(0.2, 0.8, 0.2, 1),
             on_press=self.save_credit
         )
-        btn_layout.add_widget(save_btn)
+        btn_layout.add_widget(self.save_btn)
         
         layout.add_widget(btn_layout)
         self.add_widget(layout)
     
+    watched_events = (CustomerAdded,)
+    
     def on_enter(self):
         """Called when screen is entered"""
-        self.load_customers()
+        self.sync_data()
+    
+    def reload(self):
+        self.customer_picker.refresh()
     
-    def load_customers(self):
-        """Load customer list"""
+    def apply_events(self, events):
+        # Pelanggan baru mungkin cocok dengan pencarian yang sedang tampil
+        self.customer_picker.refresh()
+    
+    def search_customers(self, query, limit, callback):
+        """Sumber data CustomerPicker (query terindeks, dibatasi `limit`)"""
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            customers = app.db_manager.get_customers()
-            customer_names = [f"{c['name']} - {c['phone']}" for c in customers]
-            self.customer_spinner.values = customer_names
-            self.customers_data = customers
+        if hasattr(app, 'db_async'):
+            app.db_async.search_customers(query, limit=limit, callback=callback)
+    
+    def on_customer_selected(self, customer):
+        self.selected_customer = customer
     
     def add_new_customer(self, instance):
         App.get_running_app().root.current = 'tambah_pelanggan'
@@ -346,14 +437,11 @@ class JualKreditScreen(Screen):
     
     def save_credit(self, instance):
         # Validate customer selection
-        if not self.customer_spinner.text or self.customer_spinner.text == 'Pilih pelanggan...':
+        customer = self.selected_customer
+        if not customer:
             self.show_error("Pilih pelanggan terlebih dahulu")
             return
         
-        # Get selected customer
-        selected_index = self.customer_spinner.values.index(self.customer_spinner.text)
-        customer = self.customers_data[selected_index]
-        
         # Validate form
         barang = self.barang_input.text.strip()
         harga_text = self.harga_input.text.strip()
@@ -379,36 +467,53 @@ class JualKreditScreen(Screen):
             self.show_error("Harga dan jumlah hari harus berupa angka")
             return
         
-        # Save to database
+        # Save to database (di worker thread)
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            credit_id = app.db_manager.add_credit(customer['id'], barang, harga, hari)
+        if hasattr(app, 'db_async'):
+            self.set_saving(True)
+            app.db_async.add_credit(
+                customer['id'], barang, harga, hari,
+                callback=lambda credit_id: self.on_credit_saved(credit_id, customer, barang, harga, hari),
+                error_callback=self.on_save_error
+            )
+    
+    def on_credit_saved(self, credit_id, customer, barang, harga, hari):
+        self.set_saving(False)
+        if credit_id:
+            # Create receipt
+            cicilan = int((harga + hari - 1) // hari)
+            receipt = Receipt(
+                receipt_number="",
+                customer_name=customer['name'],
+                item_name=barang,
+                total_price=harga,
+                total_days=hari,
+                daily_amount=cicilan,
+                days_paid=0,
+                remaining_days=hari,
+                payment_amount=0,
+                status="BARU",
+                date=date.today()
+            )
             
-            if credit_id:
-                # Create receipt
-                cicilan = int((harga + hari - 1) // hari)
-                receipt = Receipt(
-                    customer_name=customer['name'],
-                    item_name=barang,
-                    total_price=harga,
-                    total_days=hari,
-                    daily_amount=cicilan,
-                    days_paid=0,
-                    remaining_days=hari,
-                    payment_amount=0,
-                    status="BARU",
-                    date=date.today()
-                )
-                
-                # Print receipt
-                self.print_receipt(receipt)
-                
-                # Clear form
-                self.clear_form()
-                
-                self.show_success(f"Kredit untuk {customer['name']} berhasil disimpan")
-            else:
-                self.show_error("Gagal menyimpan kredit")
+            # Print receipt
+            self.print_receipt(receipt)
+            
+            # Clear form
+            self.clear_form()
+            
+            self.show_success(f"Kredit untuk {customer['name']} berhasil disimpan")
+        else:
+            self.show_error("Gagal menyimpan kredit")
+    
+    def on_save_error(self, error):
+        self.set_saving(False)
+        self.show_error(f"Gagal menyimpan kredit: {str(error)}")
+    
+    def set_saving(self, saving):
+        """Tampilkan status menyimpan dan cegah simpan ganda"""
+        self.save_btn.disabled = saving
+        self.save_btn.text = 'Menyimpan...' if saving else 'Simpan & Cetak'
     
     def print_receipt(self, receipt):
         """Print receipt via Bluetooth"""
@@ -424,7 +529,8 @@ class JualKreditScreen(Screen):
         self.harga_input.text = ''
         self.hari_input.text = ''
         self.cicilan_label.text = 'Rp 0'
-        self.customer_spinner.text = 'Pilih pelanggan...'
+        self.selected_customer = None
+        self.customer_picker.clear()
     
     def show_error(self, message):
         popup = Popup(
@@ -446,7 +552,7 @@ class JualKreditScreen(Screen):
         App.get_running_app().root.current = 'dashboard'
 
 
-class CatatBayarScreen(Screen):
+class CatatBayarScreen(LiveDataMixin, Screen):
     """Screen untuk catat pembayaran"""
     
     def __init__(self, **kwargs):
@@ -481,13 +587,14 @@ class CatatBayarScreen(Screen):
         # Credit selection
         layout.add_widget(Label(text='Pilih Kredit:', size_hint_y=None, height=dp(30), halign='left'))
         
-        self.credit_spinner = Spinner(
-            text='Pilih kredit yang akan dibayar...',
-            values=[],
+        # Cari sambil mengetik; hasil terakhir sekaligus indeks id -> kredit
+        self.credit_picker = CreditPicker(
+            search=self.search_credits,
+            select_callback=self.on_credit_selected,
             size_hint_y=None,
-            height=dp(50)
+            height=dp(200)
         )
-        layout.add_widget(self.credit_spinner)
+        layout.add_widget(self.credit_picker)
         
         # Credit info
         self.credit_info = Label(
@@ -561,44 +668,94 @@ class CatatBayarScreen(Screen):
         
         btn_layout.add_widget(Label())  # Spacer
         
-        save_btn = Button(
+        self.save_btn = Button(
             text='Simpan & Cetak',
             size_hint_x=0.4,
             background_color=(0.2, 0.8, 0.2, 1),
             on_press=self.save_payment
         )
-        btn_layout.add_widget(save_btn)
+        btn_layout.add_widget(self.save_btn)
         
         layout.add_widget(btn_layout)
         self.add_widget(layout)
         
         # Bind events
-        self.credit_spinner.bind(text=self.on_credit_selected)
         self.amount_input.bind(text=self.preview_payment)
     
+    watched_events = (CreditAdded, PaymentPosted)
+    
     def on_enter(self):
         """Called when screen is entered"""
-        self.load_active_credits()
+        self.sync_data()
+    
+    def reload(self):
+        self.credit_picker.refresh()
     
-    def load_active_credits(self):
-        """Load active credits"""
+    def search_credits(self, query, limit, callback):
+        """Sumber data CreditPicker (hanya hasil teratas yang dimuat)"""
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            credits = app.db_manager.get_credits(status='active')
-            credit_names = [f"{c['customer_name']} - {c['item_name']} (Sisa: {c['remaining_days']} hari)" 
-                           for c in credits]
-            self.credit_spinner.values = credit_names
-            self.credits_data = credits
-    
-    def on_credit_selected(self, spinner, text):
+        if hasattr(app, 'db_async'):
+            app.db_async.search_credits(query, limit=limit, callback=callback)
+    
+    def select_credit(self, credit_id):
+        """Pilih kredit berdasarkan id (mis. dari daftar Tagih Hari Ini).
+        
+        O(1) dari indeks hasil pencarian yang tampil; jika belum dimuat,
+        satu query primary key.
+        """
+        credit = self.credit_picker.items.get(credit_id)
+        if credit is not None:
+            self.credit_picker.select(credit, search_text=credit['customer_name'])
+            return
+        
+        app = App.get_running_app()
+        if hasattr(app, 'db_async'):
+            app.db_async.get_credit(credit_id, callback=self.on_credit_loaded)
+    
+    def on_credit_loaded(self, credit):
+        if credit:
+            self.credit_picker.select(credit, search_text=credit['customer_name'])
+    
+    def apply_events(self, events):
+        """Perbarui kredit yang tampil dari event (tanpa query ulang)"""
+        picker = self.credit_picker
+        for event in events:
+            if isinstance(event, CreditAdded):
+                # Kredit baru mungkin cocok dengan pencarian yang sedang tampil
+                picker.refresh()
+            elif isinstance(event, PaymentPosted):
+                result = event.result
+                credit_id = result['credit_id']
+                
+                # Record di hasil pencarian dan kredit terpilih bisa berupa
+                # objek berbeda (hasil pencarian dimuat ulang setelah memilih)
+                targets = [picker.items.get(credit_id)]
+                if self.selected_credit and self.selected_credit['id'] == credit_id:
+                    targets.append(self.selected_credit)
+                for credit in targets:
+                    if credit is not None:
+                        credit.update(
+                            total_days_paid=result['total_days_paid'],
+                            remaining_days=result['remaining_days'],
+                            total_amount_paid=result['total_amount_paid'],
+                            remaining_amount=result['remaining_amount'],
+                            payment_count=result['payment_count'],
+                            last_payment_date=result['last_payment_date'],
+                            is_completed=result['is_completed']
+                        )
+                
+                if result['status'] != 'active':
+                    picker.remove_item(credit_id)
+                elif targets[0] is not None:
+                    picker.update_item(targets[0])
+        
+        if self.selected_credit:
+            self.update_credit_info()
+    
+    def on_credit_selected(self, credit):
         """When credit is selected"""
-        if text and text != 'Pilih kredit yang akan dibayar...':
-            try:
-                selected_index = self.credit_spinner.values.index(text)
-                self.selected_credit = self.credits_data[selected_index]
-                self.update_credit_info()
-            except (ValueError, IndexError):
-                pass
+        self.selected_credit = credit
+        self.update_credit_info()
     
     def update_credit_info(self):
         """Update credit information display"""
@@ -681,43 +838,41 @@ Sisa: {credit['remaining_days']} hari"""
             self.show_error("Jumlah pembayaran harus berupa angka")
             return
         
-        # Save payment
+        # Save payment (di worker thread)
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            success = app.db_manager.add_payment(self.selected_credit['id'], amount)
+        if hasattr(app, 'db_async'):
+            self.set_saving(True)
+            app.db_async.add_payment(
+                self.selected_credit['id'], amount,
+                callback=self.on_payment_saved,
+                error_callback=self.on_save_error
+            )
+    
+    def on_payment_saved(self, result):
+        self.set_saving(False)
+        if result:
+            # Struk langsung dari hasil posting (total terbaru kredit ini)
+            receipt = Receipt.from_payment(result)
             
-            if success:
-                # Get updated credit info
-                updated_credit = app.db_manager.get_credits(customer_id=self.selected_credit['customer_id'])
-                if updated_credit:
-                    credit = updated_credit[0]
-                    
-                    # Create receipt
-                    receipt = Receipt(
-                        customer_name=credit['customer_name'],
-                        item_name=credit['item_name'],
-                        total_price=credit['total_price'],
-                        total_days=credit['total_days'],
-                        daily_amount=credit['daily_amount'],
-                        days_paid=credit['total_days_paid'],
-                        remaining_days=credit['remaining_days'],
-                        payment_amount=amount,
-                        status="SUDAH" if credit['remaining_days'] == 0 else "SUDAH",
-                        date=date.today()
-                    )
-                    
-                    # Print receipt
-                    self.print_receipt(receipt)
-                
-                # Clear form
-                self.clear_form()
-                
-                self.show_success("Pembayaran berhasil dicatat")
-                
-                # Reload credits
-                self.load_active_credits()
-            else:
-                self.show_error("Gagal menyimpan pembayaran")
+            # Print receipt
+            self.print_receipt(receipt)
+            
+            # Clear form
+            self.clear_form()
+            
+            self.show_success("Pembayaran berhasil dicatat")
+            # Daftar kredit diperbarui oleh event PaymentPosted
+        else:
+            self.show_error("Gagal menyimpan pembayaran")
+    
+    def on_save_error(self, error):
+        self.set_saving(False)
+        self.show_error(f"Gagal menyimpan pembayaran: {str(error)}")
+    
+    def set_saving(self, saving):
+        """Tampilkan status menyimpan dan cegah simpan ganda"""
+        self.save_btn.disabled = saving
+        self.save_btn.text = 'Menyimpan...' if saving else 'Simpan & Cetak'
     
     def print_receipt(self, receipt):
         """Print receipt via Bluetooth"""
@@ -730,10 +885,10 @@ Sisa: {credit['remaining_days']} hari"""
     
     def clear_form(self):
         self.amount_input.text = ''
-        self.credit_spinner.text = 'Pilih kredit yang akan dibayar...'
         self.credit_info.text = 'Pilih kredit untuk melihat detail'
         self.payment_preview.text = ''
         self.selected_credit = None
+        self.credit_picker.clear()
     
     def show_error(self, message):
         popup = Popup(
@@ -755,12 +910,14 @@ Sisa: {credit['remaining_days']} hari"""
         App.get_running_app().root.current = 'dashboard'
 
 
-class TagihHariIniScreen(Screen):
+class TagihHariIniScreen(LiveDataMixin, Screen):
     """Screen untuk tagihan hari ini"""
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = 'tagih_hari_ini'
+        self.collections = []
+        self.collections_day = None  # diisi saat muatan pertama (async) selesai
         self.setup_ui()
     
     def setup_ui(self):
@@ -801,31 +958,77 @@ class TagihHariIniScreen(Screen):
         )
         layout.add_widget(self.summary_label)
         
-        # Collection list
-        scroll = ScrollView()
-        self.collection_layout = BoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None)
-        self.collection_layout.bind(minimum_height=self.collection_layout.setter('height'))
-        
-        scroll.add_widget(self.collection_layout)
-        layout.add_widget(scroll)
+        # Collection list (virtual: hanya baris yang terlihat yang dibuat)
+        self.collection_list = CollectionListView(
+            pay_callback=self.go_to_payment,
+            reprint_callback=self.reprint_receipt
+        )
+        layout.add_widget(self.collection_list)
         
         self.add_widget(layout)
     
+    watched_events = (CreditAdded, PaymentPosted)
+    
     def on_enter(self):
         """Called when screen is entered"""
+        # Ganti hari: daftar tagihan berubah total
+        if self.collections_day != date.today():
+            self._pending_events = None
+        self.sync_data()
+    
+    def reload(self):
         self.refresh_data()
     
     def refresh_data(self, instance=None):
         """Refresh collection data"""
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            collections = app.db_manager.get_today_collections()
-            self.update_collection_list(collections)
+        if hasattr(app, 'db_async'):
+            self.summary_label.text = 'Memuat...'
+            app.db_async.get_today_collections(callback=self.on_collections_loaded)
+    
+    def on_collections_loaded(self, collections):
+        self.collections = collections
+        self.collections_day = date.today()
+        self.update_collection_list(collections)
+    
+    def apply_events(self, events):
+        """Perbarui daftar tagihan dari event (tanpa query ulang)"""
+        if self.collections_day != date.today():
+            return False
+        
+        today = self.collections_day.isoformat()
+        collections = self.collections
+        for event in events:
+            if isinstance(event, CreditAdded):
+                collections.append({
+                    'credit_id': event.credit_id,
+                    'customer_name': event.customer_name,
+                    'daily_amount': event.daily_amount,
+                    'paid_today': False,
+                    'total_days_paid': 0,
+                    'remaining_days': event.total_days,
+                    'item_name': event.item_name
+                })
+            elif isinstance(event, PaymentPosted):
+                result = event.result
+                for i, collection in enumerate(collections):
+                    if collection['credit_id'] == result['credit_id']:
+                        if result['remaining_days'] <= 0:
+                            # Sudah lunas: tidak ditagih lagi
+                            del collections[i]
+                        else:
+                            collection['total_days_paid'] = result['total_days_paid']
+                            collection['remaining_days'] = result['remaining_days']
+                            if result['payment_date'] == today:
+                                collection['paid_today'] = True
+                        break
+        
+        # Urutan sama dengan get_today_collections: belum bayar di atas
+        collections.sort(key=lambda c: (c['paid_today'], c['customer_name'], c['credit_id']))
+        self.update_collection_list(collections)
     
     def update_collection_list(self, collections):
         """Update collection list display"""
-        self.collection_layout.clear_widgets()
-        
         # Update summary
         total_count = len(collections)
         paid_count = sum(1 for c in collections if c['paid_today'])
@@ -834,129 +1037,46 @@ class TagihHariIniScreen(Screen):
         summary_text = f"Total: {total_count} | Sudah: {paid_count} | Belum: {unpaid_count}"
         self.summary_label.text = summary_text
         
-        # Add collection items
-        for collection in collections:
-            item_layout = BoxLayout(
-                size_hint_y=None,
-                height=dp(80),
-                spacing=dp(10),
-                padding=[dp(10), dp(5)]
-            )
-            
-            # Status icon
-            status_color = (0.2, 0.8, 0.2, 1) if collection['paid_today'] else (0.8, 0.2, 0.2, 1)
-            status_icon = "✓" if collection['paid_today'] else "!"
-            
-            status_label = Label(
-                text=status_icon,
-                size_hint_x=None,
-                width=dp(30),
-                font_size=dp(20),
-                color=status_color
-            )
-            item_layout.add_widget(status_label)
-            
-            # Customer info
-            info_text = f"{collection['customer_name']}\n{collection['item_name']}"
-            info_label = Label(
-                text=info_text,
-                size_hint_x=0.5,
-                text_size=(dp(150), None),
-                halign='left',
-                valign='middle'
-            )
-            item_layout.add_widget(info_label)
-            
-            # Amount and status
-            amount_text = f"{format_currency(collection['daily_amount'])}\n"
-            amount_text += f"({collection['total_days_paid']}x | {collection['remaining_days']}x)"
-            
-            amount_label = Label(
-                text=amount_text,
-                size_hint_x=0.3,
-                text_size=(dp(100), None),
-                halign='right',
-                valign='middle'
-            )
-            item_layout.add_widget(amount_label)
-            
-            # Action button
-            if collection['paid_today']:
-                action_btn = Button(
-                    text='Cetak Ulang',
-                    size_hint_x=0.2,
-                    background_color=(0.6, 0.6, 0.6, 1),
-                    on_press=lambda x, cid=collection['credit_id']: self.reprint_receipt(cid)
-                )
-            else:
-                action_btn = Button(
-                    text='Bayar',
-                    size_hint_x=0.2,
-                    background_color=(0.2, 0.8, 0.2, 1),
-                    on_press=lambda x, cid=collection['credit_id']: self.go_to_payment(cid)
-                )
-            
-            item_layout.add_widget(action_btn)
-            
-            # Add separator
-            separator = Label(
-                text='',
-                size_hint_y=None,
-                height=dp(1),
-                canvas=None
-            )
-            
-            self.collection_layout.add_widget(item_layout)
-            self.collection_layout.add_widget(separator)
+        # Data model RecycleView. Delta mengubah dict baris di tempat, jadi
+        # list baru bisa sama (==) dengan yang lama dan ListProperty tidak
+        # dispatch; refresh_from_data() memaksa baris terlihat diisi ulang
+        # (digabung dengan refresh dari dispatch dalam satu frame)
+        self.collection_list.data = collections
+        self.collection_list.refresh_from_data()
     
     def go_to_payment(self, credit_id):
         """Go to payment screen for specific credit"""
-        # Switch to payment screen and pre-select credit
         app = App.get_running_app()
+        app.root.get_screen('catat_bayar').select_credit(credit_id)
         app.root.current = 'catat_bayar'
-        
-        # Schedule to select the credit after screen transition
-        Clock.schedule_once(lambda dt: self.select_credit_in_payment_screen(credit_id), 0.1)
-    
-    def select_credit_in_payment_screen(self, credit_id):
-        """Select specific credit in payment screen"""
-        app = App.get_running_app()
-        payment_screen = app.root.get_screen('catat_bayar')
-        
-        # Find and select the credit
-        if hasattr(payment_screen, 'credits_data'):
-            for i, credit in enumerate(payment_screen.credits_data):
-                if credit['id'] == credit_id:
-                    payment_screen.credit_spinner.text = payment_screen.credit_spinner.values[i]
-                    payment_screen.selected_credit = credit
-                    payment_screen.update_credit_info()
-                    break
     
     def reprint_receipt(self, credit_id):
         """Reprint receipt for paid credit"""
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            # Get credit info
-            credits = app.db_manager.get_credits()
-            credit = next((c for c in credits if c['id'] == credit_id), None)
-            
-            if credit:
-                # Create receipt
-                receipt = Receipt(
-                    customer_name=credit['customer_name'],
-                    item_name=credit['item_name'],
-                    total_price=credit['total_price'],
-                    total_days=credit['total_days'],
-                    daily_amount=credit['daily_amount'],
-                    days_paid=credit['total_days_paid'],
-                    remaining_days=credit['remaining_days'],
-                    payment_amount=credit['daily_amount'],  # Assume daily amount
-                    status="SUDAH",
-                    date=date.today()
-                )
-                
-                # Print receipt
-                self.print_receipt(receipt)
+        if hasattr(app, 'db_async'):
+            # Satu kredit + pembayaran terakhirnya (lookup terindeks, di worker thread)
+            app.db_async.get_credit(
+                credit_id,
+                callback=self.on_reprint_loaded,
+                error_callback=self.on_reprint_error
+            )
+    
+    def on_reprint_loaded(self, credit):
+        if not credit:
+            self.show_error("Kredit tidak ditemukan")
+            return
+        
+        # Struk dibangun ulang dari pembayaran terakhir yang tercatat
+        receipt = Receipt.from_last_payment(credit)
+        if receipt is None:
+            self.show_error("Belum ada pembayaran untuk dicetak ulang")
+            return
+        
+        # Print receipt
+        self.print_receipt(receipt)
+    
+    def on_reprint_error(self, error):
+        self.show_error(f"Gagal memuat data struk: {str(error)}")
     
     def print_receipt(self, receipt):
         """Print receipt via Bluetooth"""
@@ -988,7 +1108,7 @@ class TagihHariIniScreen(Screen):
         App.get_running_app().root.current = 'dashboard'
 
 
-class LaporanScreen(Screen):
+class LaporanScreen(LiveDataMixin, Screen):
     """Screen untuk laporan"""
     
     def __init__(self, **kwargs):
@@ -1016,13 +1136,13 @@ class LaporanScreen(Screen):
         )
         header_layout.add_widget(title)
         
-        export_btn = Button(
+        self.export_btn = Button(
             text='📄 Ekspor',
             size_hint_x=0.3,
             background_color=(0.2, 0.8, 0.2, 1),
             on_press=self.export_report
         )
-        header_layout.add_widget(export_btn)
+        header_layout.add_widget(self.export_btn)
         
         layout.add_widget(header_layout)
         
@@ -1048,151 +1168,148 @@ class LaporanScreen(Screen):
         
         layout.add_widget(summary_layout)
         
-        # Report table
-        scroll = ScrollView()
-        self.report_layout = BoxLayout(orientation='vertical', spacing=dp(2), size_hint_y=None)
-        self.report_layout.bind(minimum_height=self.report_layout.setter('height'))
+        # Aging piutang & setoran (analytics.portfolio_report)
+        self.analytics_label = Label(
+            text='',
+            size_hint_y=None,
+            height=dp(120),
+            font_size=dp(12),
+            halign='left',
+            valign='top'
+        )
+        self.analytics_label.bind(size=lambda label, size: setattr(label, 'text_size', size))
+        layout.add_widget(self.analytics_label)
         
-        scroll.add_widget(self.report_layout)
-        layout.add_widget(scroll)
+        # Report table (virtual, dimuat per halaman, kolom bisa diurutkan)
+        self.report_table = ReportTable(fetch_page=self.fetch_credit_page)
+        layout.add_widget(self.report_table)
         
         self.add_widget(layout)
     
+    watched_events = (CreditAdded, PaymentPosted, HolidayMarked)
+    
     def on_enter(self):
         """Called when screen is entered"""
+        # Laporan hanya dihitung ulang jika ada perubahan data sejak terakhir
+        # dibuka (atau sudah ganti hari)
+        if getattr(self, 'report_day', None) != date.today():
+            self._pending_events = None
+        self.sync_data()
+    
+    def reload(self):
         self.load_report_data()
     
+    def apply_events(self, events):
+        # Ringkasan dan analitik adalah agregat: hitung ulang penuh
+        return False
+    
     def load_report_data(self):
         """Load report data"""
         app = App.get_running_app()
-        if hasattr(app, 'db_manager'):
-            # Get all credits
-            active_credits = app.db_manager.get_credits(status='active')
-            completed_credits = app.db_manager.get_credits(status='completed')
+        if hasattr(app, 'db_async'):
+            db = app.db_manager
             
-            self.update_report_display(active_credits, completed_credits)
+            # Total dari mesin analitik; tabel memuat halamannya sendiri
+            self.set_loading(True)
+            app.db_async.submit(
+                portfolio_report, db,
+                callback=self.on_report_loaded,
+                error_callback=self.on_report_error
+            )
+            self.report_table.reload()
+    
+    def fetch_credit_page(self, sort_by, descending, after, limit, callback):
+        """Sumber data ReportTable: satu halaman kredit aktif"""
+        app = App.get_running_app()
+        if hasattr(app, 'db_async'):
+            app.db_async.get_credits_sorted_page(
+                sort_by, descending, after, limit=limit, callback=callback
+            )
     
-    def update_report_display(self, active_credits, completed_credits):
+    def on_report_loaded(self, report):
+        self.report_day = date.today()
+        self.set_loading(False)
+        self.update_report_display(report)
+    
+    def on_report_error(self, error):
+        self.set_loading(False)
+        self.show_error(f"Gagal memuat laporan: {str(error)}")
+    
+    def set_loading(self, loading):
+        """Tampilkan status memuat selama laporan dihitung di worker"""
+        self.export_btn.disabled = loading
+        if loading:
+            self.analytics_label.text = 'Memuat laporan...'
+    
+    def update_report_display(self, report):
         """Update report display"""
-        self.report_layout.clear_widgets()
-        
-        # Calculate totals
-        total_piutang = sum(c['remaining_amount'] for c in active_credits)
-        total_lunas = sum(c['total_price'] for c in completed_credits)
+        summary = report['summary']
         
         # Update summary cards
-        self.total_piutang_card.text = f'Total Piutang\n{format_currency(total_piutang)}'
-        self.total_lunas_card.text = f'Total Lunas\n{format_currency(total_lunas)}'
-        
-        # Table header
-        header_layout = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(2))
-        
-        headers = ['Nama', 'Barang', 'Total', 'Sudah', 'Sisa']
-        for header in headers:
-            header_label = Label(
-                text=header,
-                size_hint_x=0.2,
-                font_size=dp(12),
-                bold=True,
-                color=(0.2, 0.6, 0.8, 1)
-            )
-            header_layout.add_widget(header_label)
-        
-        self.report_layout.add_widget(header_layout)
-        
-        # Add separator
-        separator = Label(text='', size_hint_y=None, height=dp(2))
-        self.report_layout.add_widget(separator)
+        self.total_piutang_card.text = f"Total Piutang\n{format_currency(summary['total_piutang'])}"
+        self.total_lunas_card.text = f"Total Lunas\n{format_currency(summary['total_lunas'])}"
+        self.analytics_label.text = '\n'.join(self.format_analytics(report))
+    
+    def export_report(self, instance):
+        """Export report to PDF"""
+        app = App.get_running_app()
+        if not hasattr(app, 'db_async'):
+            return
+        db = app.db_manager
         
-        # Table rows - Active credits
-        for credit in active_credits:
-            row_layout = BoxLayout(size_hint_y=None, height=dp(60), spacing=dp(2))
-            
-            # Customer name
-            name_label = Label(
-                text=credit['customer_name'][:15],
-                size_hint_x=0.2,
-                text_size=(dp(60), None),
-                halign='left',
-                valign='middle',
-                font_size=dp(11)
-            )
-            row_layout.add_widget(name_label)
-            
-            # Item name
-            item_label = Label(
-                text=credit['item_name'][:15],
-                size_hint_x=0.2,
-                text_size=(dp(60), None),
-                halign='left',
-                valign='middle',
-                font_size=dp(11)
-            )
-            row_layout.add_widget(item_label)
-            
-            # Total price
-            total_label = Label(
-                text=format_currency(credit['total_price']),
-                size_hint_x=0.2,
-                text_size=(dp(60), None),
-                halign='right',
-                valign='middle',
-                font_size=dp(11)
-            )
-            row_layout.add_widget(total_label)
+        def write_report():
+            # Create simple text report
+            active_credits = db.get_credits(status='active')
+            report = portfolio_report(db)
             
-            # Paid amount
-            paid_label = Label(
-                text=format_currency(credit['total_amount_paid']),
-                size_hint_x=0.2,
-                text_size=(dp(60), None),
-                halign='right',
-                valign='middle',
-                font_size=dp(11),
-                color=(0.2, 0.8, 0.2, 1)
-            )
-            row_layout.add_widget(paid_label)
+            # Generate report text
+            report_text = self.generate_report_text(active_credits, report)
             
-            # Remaining amount
-            remaining_label = Label(
-                text=format_currency(credit['remaining_amount']),
-                size_hint_x=0.2,
-                text_size=(dp(60), None),
-                halign='right',
-                valign='middle',
-                font_size=dp(11),
-                color=(0.8, 0.2, 0.2, 1)
-            )
-            row_layout.add_widget(remaining_label)
+            # Save to file
+            filename = f"laporan_kredit_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            filepath = os.path.join(os.path.expanduser('~'), 'Documents', filename)
             
-            self.report_layout.add_widget(row_layout)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(report_text)
+            return filepath
+        
+        self.export_btn.disabled = True
+        self.export_btn.text = 'Mengekspor...'
+        app.db_async.submit(
+            write_report,
+            callback=self.on_report_exported,
+            error_callback=self.on_export_error
+        )
     
-    def export_report(self, instance):
-        """Export report to PDF"""
-        try:
-            # Create simple text report
-            app = App.get_running_app()
-            if hasattr(app, 'db_manager'):
-                active_credits = app.db_manager.get_credits(status='active')
-                completed_credits = app.db_manager.get_credits(status='completed')
-                
-                # Generate report text
-                report_text = self.generate_report_text(active_credits, completed_credits)
-                
-                # Save to file
-                from datetime import datetime
-                filename = f"laporan_kredit_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                filepath = os.path.join(os.path.expanduser('~'), 'Documents', filename)
-                
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(report_text)
-                
-                self.show_success(f"Laporan berhasil diekspor ke:\n{filepath}")
+    def on_report_exported(self, filepath):
+        self.export_btn.disabled = False
+        self.export_btn.text = '📄 Ekspor'
+        self.show_success(f"Laporan berhasil diekspor ke:\n{filepath}")
+    
+    def on_export_error(self, error):
+        self.export_btn.disabled = False
+        self.export_btn.text = '📄 Ekspor'
+        self.show_error(f"Gagal mengekspor laporan: {str(error)}")
+    
+    def format_analytics(self, report):
+        """Baris ringkasan aging piutang dan setoran dari portfolio_report"""
+        lines = ["Aging piutang (hari tertunggak):"]
+        for bucket in report['aging']:
+            lines.append(f"  {bucket['label']}: {bucket['count']} kredit, {format_currency(bucket['outstanding'])}")
+        
+        inflow = report['inflow']
+        rate = inflow['collection_rate']
+        rate_text = f" ({rate * 100:.0f}%)" if rate is not None else ""
+        lines.append(
+            f"Setoran {len(inflow['dates'])} hari: {format_currency(inflow['total_actual'])}"
+            f" dari {format_currency(inflow['total_expected'])}{rate_text}"
+        )
         
-        except Exception as e:
-            self.show_error(f"Gagal mengekspor laporan: {str(e)}")
+        behind = report['days_behind']
+        lines.append(f"Tertunggak: median {behind['median']:.0f} hari, maks {behind['max']} hari")
+        return lines
     
-    def generate_report_text(self, active_credits, completed_credits):
+    def generate_report_text(self, active_credits, report):
         """Generate report text"""
         from datetime import datetime
         
@@ -1204,14 +1321,17 @@ class LaporanScreen(Screen):
         lines.append("")
         
         # Summary
-        total_piutang = sum(c['remaining_amount'] for c in active_credits)
-        total_lunas = sum(c['total_price'] for c in completed_credits)
+        summary = report['summary']
         
         lines.append("RINGKASAN:")
-        lines.append(f"Total Piutang Aktif: {format_currency(total_piutang)}")
-        lines.append(f"Total Kredit Lunas: {format_currency(total_lunas)}")
-        lines.append(f"Jumlah Kredit Aktif: {len(active_credits)}")
-        lines.append(f"Jumlah Kredit Lunas: {len(completed_credits)}")
+        lines.append(f"Total Piutang Aktif: {format_currency(summary['total_piutang'])}")
+        lines.append(f"Total Kredit Lunas: {format_currency(summary['total_lunas'])}")
+        lines.append(f"Jumlah Kredit Aktif: {summary['active_count']}")
+        lines.append(f"Jumlah Kredit Lunas: {summary['completed_count']}")
+        lines.append("")
+        
+        lines.append("ANALISIS:")
+        lines.extend(self.format_analytics(report))
         lines.append("")
         
         # Active credits detail
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistik Dashboard untuk Toko Kredit Syariah
+Penghitung di memori yang diperbarui setiap ada kredit, pembayaran atau
+hari libur baru; dihitung ulang penuh hanya saat ganti hari
+"""
+
+import threading
+from datetime import datetime
+
+from events import CreditAdded, PaymentPosted, HolidayMarked, DataReloaded
+
+
+class DashboardStats:
+    """Penghitung total piutang dan tagihan hari ini.
+
+    Tagihan hari ini = kredit yang belum lunas ditambah kredit yang
+    dibayar hari ini (termasuk yang lunas hari ini), kosong jika hari ini
+    libur. Sama dengan hasil _recompute kapan pun.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._lock = threading.RLock()
+        self._day = None  # tanggal penghitung terakhir dihitung ulang
+        # Watermark _recompute: id pembayaran/kredit terbesar yang sudah
+        # termasuk; event dengan id <= watermark tidak diterapkan lagi
+        self._payment_mark = 0
+        self._credit_mark = 0
+        self.total_piutang = 0.0
+        self.sudah_bayar = 0     # jumlah kredit tertagih yang sudah bayar hari ini
+        self.due_today = set()   # credit_id yang ditagih hari ini
+        self.paid_today = set()  # credit_id yang sudah bayar hari ini
+
+    def invalidate(self):
+        """Paksa hitung ulang pada pembacaan berikutnya (mis. setelah restore)"""
+        with self._lock:
+            self._day = None
+
+    def _ensure_current(self):
+        """Hitung ulang jika belum pernah atau tanggal sudah berganti.
+
+        Return True jika baru dihitung ulang (data terbaru sudah termasuk,
+        sehingga event yang memicu tidak perlu diterapkan lagi).
+        """
+        today = datetime.now().date()
+        if self._day != today:
+            self._recompute(today)
+            return True
+        return False
+
+    def _recompute(self, today):
+        """Hitung ulang semua penghitung dengan satu query.
+
+        Event dari pembayaran yang sudah commit tetapi belum sampai ke
+        handler bisa tiba setelah hitung ulang ini. Watermark dibaca dalam
+        snapshot yang sama dengan query utama, sehingga event seperti itu
+        dikenali dan tidak dihitung dua kali.
+        """
+        with self.db_manager.connections.transaction() as cursor:
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM payments')
+            payment_mark = cursor.fetchone()[0]
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM credits')
+            credit_mark = cursor.fetchone()[0]
+
+            # Kredit yang lunas hari ini (oleh pembayaran hari ini) tetap
+            # termasuk tagihan hari ini
+            cursor.execute('''
+                SELECT c.id, c.status, c.total_days, c.daily_amount,
+                       COALESCE(s.total_days_paid, 0),
+                       EXISTS (
+                           SELECT 1 FROM payments p
+                           WHERE p.credit_id = c.id AND p.payment_date = ?
+                       ) as paid_today
+                FROM credits c
+                LEFT JOIN payment_summaries s ON s.credit_id = c.id
+                WHERE c.status = 'active'
+                   OR c.id IN (SELECT credit_id FROM payments WHERE payment_date = ?)
+            ''', (today.isoformat(), today.isoformat()))
+            rows = cursor.fetchall()
+
+        holiday = self.db_manager.is_holiday(today)
+
+        total_piutang = 0.0
+        due_today = set()
+        paid_today = set()
+        for credit_id, status, total_days, daily_amount, total_days_paid, paid in rows:
+            remaining_days = max(0, total_days - total_days_paid)
+            if status == 'active':
+                total_piutang += remaining_days * daily_amount
+            if paid:
+                paid_today.add(credit_id)
+            if not holiday and (remaining_days > 0 or paid):
+                due_today.add(credit_id)
+
+        self.total_piutang = total_piutang
+        self.sudah_bayar = len(due_today & paid_today)
+        self.due_today = due_today
+        self.paid_today = paid_today
+        self._payment_mark = payment_mark
+        self._credit_mark = credit_mark
+        self._day = today
+
+    # === Event dari DatabaseManager ===
+
+    def on_event(self, event):
+        """Handler EventBus (dipanggil di thread penulis, setelah commit)"""
+        if isinstance(event, PaymentPosted):
+            self.payment_posted(event.result)
+        elif isinstance(event, CreditAdded):
+            self.credit_added(event.credit_id, event.total_days, event.daily_amount)
+        elif isinstance(event, HolidayMarked):
+            # Hanya libur hari ini yang mengubah tagihan
+            if event.covers(datetime.now().date()):
+                self.invalidate()
+        elif isinstance(event, DataReloaded):
+            self.invalidate()
+
+    def credit_added(self, credit_id, total_days, daily_amount):
+        """Kredit baru: tambah piutang, ikut ditagih mulai hari ini"""
+        with self._lock:
+            if self._ensure_current() or credit_id <= self._credit_mark:
+                return
+            self.total_piutang += total_days * daily_amount
+            if not self.db_manager.is_holiday(self._day):
+                self.due_today.add(credit_id)
+
+    def payment_posted(self, result):
+        """Pembayaran baru (dict hasil add_payment/add_payments_bulk)"""
+        with self._lock:
+            if self._ensure_current() or result['payment_id'] <= self._payment_mark:
+                return
+
+            # Piutang berkurang sebesar sisa hari yang terlunasi
+            total_days = result['total_days']
+            before = max(0, total_days - (result['total_days_paid'] - result['days_paid']))
+            self.total_piutang -= (before - result['remaining_days']) * result['daily_amount']
+
+            credit_id = result['credit_id']
+            if result['payment_date'] == self._day.isoformat():
+                if credit_id not in self.paid_today:
+                    self.paid_today.add(credit_id)
+                    if not self.db_manager.is_holiday(self._day):
+                        self.due_today.add(credit_id)
+                        self.sudah_bayar += 1
+            elif result['is_completed'] and credit_id not in self.paid_today:
+                # Lunas oleh pembayaran tanggal lain: tidak ditagih lagi hari ini
+                self.due_today.discard(credit_id)
+
+    # === Pembacaan ===
+
+    def snapshot(self):
+        """Nilai penghitung saat ini (tanpa query kecuali saat ganti hari)"""
+        with self._lock:
+            self._ensure_current()
+            return {
+                'total_piutang': self.total_piutang,
+                'tagihan_hari_ini': len(self.due_today),
+                'sudah_bayar': self.sudah_bayar,
+                'belum_bayar': len(self.due_today) - self.sudah_bayar
+            }
+
+    def is_paid_today(self, credit_id):
+        """Cek apakah kredit sudah bayar hari ini"""
+        with self._lock:
+            self._ensure_current()
+            return credit_id in self.paid_today
@@ -0,0 +1,21 @@
+"""Fixture bersama untuk test Toko Kredit Syariah"""
+
+import os
+import sys
+
+import pytest
+
+# Modul aplikasi ada di root repo (bukan package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'rahasia-test'
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager baru di file sementara"""
+    from database import DatabaseManager
+
+    manager = DatabaseManager(str(tmp_path / 'toko.db'), PASSWORD)
+    yield manager
+    manager.close()
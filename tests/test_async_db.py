@@ -0,0 +1,143 @@
+"""AsyncDatabase tanpa Kivy: pekerjaan jalan di worker thread secara
+berurutan, hasil hanya dikirim lewat Clock.schedule_once (main thread)"""
+
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from async_db import AsyncDatabase
+
+
+class FakeClock:
+    """Pengganti kivy.clock.Clock: simpan jadwal, jalankan saat tick()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self.scheduled = []
+
+    def schedule_once(self, callback, timeout=0):
+        with self._lock:
+            self.scheduled.append(callback)
+            self._ready.notify_all()
+
+    def wait(self, timeout=5):
+        """Tunggu sampai worker menjadwalkan sesuatu"""
+        with self._lock:
+            return self._ready.wait_for(lambda: self.scheduled, timeout)
+
+    def tick(self):
+        with self._lock:
+            callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback(0)
+        return len(callbacks)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    kivy = types.ModuleType('kivy')
+    kivy_clock = types.ModuleType('kivy.clock')
+    kivy_clock.Clock = clock
+    kivy.clock = kivy_clock
+    monkeypatch.setitem(sys.modules, 'kivy', kivy)
+    monkeypatch.setitem(sys.modules, 'kivy.clock', kivy_clock)
+    return clock
+
+
+class Recorder:
+    """DatabaseManager palsu yang mencatat thread dan urutan panggilan"""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, value, delay=0):
+        """Catat nilai beserta thread pemanggil"""
+        time.sleep(delay)
+        self.calls.append((value, threading.current_thread().name))
+        return value
+
+    def fail(self, message):
+        raise ValueError(message)
+
+
+@pytest.fixture
+def async_db():
+    db_async = AsyncDatabase(Recorder())
+    yield db_async
+    db_async.shutdown()
+
+
+def test_calls_run_on_worker_thread_in_order(async_db):
+    futures = [async_db.record(i, delay=0.002 * (i % 3)) for i in range(30)]
+    futures.append(async_db.submit(async_db.db_manager.record, 'submit'))
+
+    assert [f.result(timeout=5) for f in futures] == list(range(30)) + ['submit']
+    assert [value for value, _ in async_db.db_manager.calls] == list(range(30)) + ['submit']
+    threads = {name for _, name in async_db.db_manager.calls}
+    assert len(threads) == 1
+    assert threads.pop().startswith('db-worker')
+
+
+def test_call_does_not_block_caller(async_db):
+    started = time.perf_counter()
+    future = async_db.record('lambat', delay=0.3)
+    assert time.perf_counter() - started < 0.1
+    assert future.result(timeout=5) == 'lambat'
+
+
+def test_proxy_keeps_method_metadata(async_db):
+    assert async_db.record.__name__ == 'record'
+    assert async_db.record.__doc__ == Recorder.record.__doc__
+
+
+def test_callback_delivered_only_through_clock(async_db, clock):
+    delivered = []
+    main_thread = threading.current_thread()
+
+    def on_result(result):
+        delivered.append((result, threading.current_thread()))
+
+    future = async_db.record('ok', callback=on_result, error_callback=pytest.fail)
+    future.result(timeout=5)
+    assert clock.wait()
+
+    # Belum ada yang dipanggil sampai Clock berjalan di main thread
+    assert delivered == []
+    assert clock.tick() == 1
+    assert delivered == [('ok', main_thread)]
+
+
+def test_error_delivered_to_error_callback(async_db, clock):
+    errors = []
+    results = []
+
+    future = async_db.fail('rusak', callback=results.append, error_callback=errors.append)
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    assert clock.wait()
+
+    assert errors == []
+    assert clock.tick() == 1
+    assert results == []
+    assert len(errors) == 1 and str(errors[0]) == 'rusak'
+
+
+def test_no_callback_schedules_nothing(async_db, clock):
+    async_db.record('diam').result(timeout=5)
+    time.sleep(0.01)
+    assert clock.scheduled == []
+
+
+def test_shutdown_waits_for_queued_writes(db, clock):
+    db_async = AsyncDatabase(db)
+    futures = [db_async.add_customer(f'Pelanggan {i}') for i in range(20)]
+    db_async.shutdown(wait=True)
+
+    assert all(f.done() for f in futures)
+    assert [f.result() for f in futures] == sorted(f.result() for f in futures)
+    assert len(db.get_customers()) == 20
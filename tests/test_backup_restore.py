@@ -0,0 +1,73 @@
+"""Restore backup: data turunan dibangun ulang dalam transaksi restore,
+cache dibuang setelah commit"""
+
+import json
+import threading
+from datetime import date
+
+import pytest
+
+from backup import BackupManager
+from conftest import PASSWORD
+from events import DataReloaded
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    # Folder backup dibuat di ~/KreditBackup
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+
+
+def seed(db):
+    customer_id = db.add_customer('Ani', 'Jalan', '0812')
+    credit_id = db.add_credit(customer_id, 'Kulkas', 300000, 30)
+    db.add_payment(credit_id, 20000)
+    return credit_id
+
+
+def test_restore_without_db_manager_rebuilds_summaries(db):
+    credit_id = seed(db)
+    manager = BackupManager(db.db_path, PASSWORD)
+    path = manager.create_backup()
+
+    # Backup lama: belum ada tabel payment_summaries
+    data = json.loads(manager._decrypt_backup(open(path, 'rb').read()).decode())
+    del data['tables']['payment_summaries']
+    with open(path, 'wb') as f:
+        f.write(manager.fernet.encrypt(json.dumps(data).encode()))
+
+    assert manager.restore_backup(path)
+    assert db.check_summaries() == []
+    assert db.get_credit(credit_id)['total_days_paid'] == 2
+
+
+def test_restore_reloads_caches_after_commit(db):
+    seed(db)
+    manager = BackupManager(db.db_path, PASSWORD, db_manager=db)
+    path = manager.create_backup()
+    expected = db.get_dashboard_stats()
+
+    # Data berubah setelah backup; cache libur & statistik terisi
+    db.add_credit(1, 'Televisi', 600000, 60)
+    db.mark_holiday(date.today())
+    assert db.is_holiday(date.today())
+    assert db.get_dashboard_stats() != expected
+
+    # Pelanggan DataReloaded membaca dari thread lain (koneksi sendiri)
+    seen = []
+
+    def on_reloaded(event):
+        def read():
+            seen.append((db.is_holiday(date.today()), db.get_dashboard_stats()))
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join()
+
+    db.events.subscribe(on_reloaded, DataReloaded)
+    assert manager.restore_backup(path)
+
+    assert seen == [(False, expected)]
+    assert not db.is_holiday(date.today())
+    assert db.get_dashboard_stats() == expected
+    db.stats.invalidate()
+    assert db.get_dashboard_stats() == expected
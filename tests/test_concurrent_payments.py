@@ -0,0 +1,81 @@
+"""Stress test posting pembayaran dari banyak thread: tidak boleh ada
+update yang hilang pada ringkasan maupun penghitung dashboard"""
+
+import threading
+from collections import defaultdict
+
+WRITERS = 8
+POSTS_PER_WRITER = 200
+READERS = 2
+CREDITS = 5
+
+
+def test_concurrent_posting_loses_no_updates(db):
+    credit_ids = []
+    for i in range(CREDITS):
+        customer_id = db.add_customer(f'Pelanggan {i}', 'Jalan', f'0812{i:06d}')
+        # Cicilan 10/hari, jadi setiap pembayaran 10 = tepat satu hari
+        credit_ids.append(db.add_credit(customer_id, 'Barang', 1_000_000, 100_000))
+
+    results = []
+    errors = []
+    writing = threading.Event()
+    writing.set()
+
+    def writer(index):
+        try:
+            for k in range(POSTS_PER_WRITER):
+                credit_id = credit_ids[(index + k) % CREDITS]
+                # Sebagian writer lewat jalur bulk (setoran akhir keliling)
+                if index % 4 == 3:
+                    result = db.add_payments_bulk([(credit_id, 10)])['results'][0]
+                else:
+                    result = db.add_payment(credit_id, 10)
+                results.append(result)
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        seen = defaultdict(int)
+        try:
+            while writing.is_set():
+                for credit in db.get_credits():
+                    # Total yang terbaca tidak boleh mundur
+                    assert credit['total_days_paid'] >= seen[credit['id']]
+                    seen[credit['id']] = credit['total_days_paid']
+                db.get_dashboard_stats()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(READERS)]
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writing.clear()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == WRITERS * POSTS_PER_WRITER
+    assert db.check_summaries() == []
+
+    # Setiap posting melihat total sebelumnya yang sudah di-commit:
+    # total per kredit dari hasil posting tepat 1..n tanpa duplikat
+    totals = defaultdict(list)
+    for result in results:
+        totals[result['credit_id']].append(result['total_days_paid'])
+    for credit_id in credit_ids:
+        assert sorted(totals[credit_id]) == list(range(1, len(totals[credit_id]) + 1))
+
+    credits = {credit['id']: credit for credit in db.get_credits()}
+    for credit_id in credit_ids:
+        assert credits[credit_id]['total_days_paid'] == len(totals[credit_id])
+        assert credits[credit_id]['total_amount_paid'] == 10 * len(totals[credit_id])
+
+    # Penghitung dashboard (delta dari event) sama dengan hitung ulang penuh
+    live = db.get_dashboard_stats()
+    db.stats.invalidate()
+    assert db.get_dashboard_stats() == live
+    assert live['sudah_bayar'] == CREDITS
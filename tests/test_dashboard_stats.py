@@ -0,0 +1,84 @@
+"""DashboardStats: event yang tiba setelah hitung ulang (sudah termasuk
+di dalamnya) tidak boleh dihitung dua kali"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from events import CreditAdded, PaymentPosted
+
+
+def recomputed(db):
+    """Snapshot hasil hitung ulang penuh"""
+    db.stats.invalidate()
+    return db.get_dashboard_stats()
+
+
+@pytest.fixture
+def shop(db):
+    customer_id = db.add_customer('Ani', 'Jalan', '0812')
+    credit_ids = [db.add_credit(customer_id, f'Barang {i}', 300000, 30) for i in range(3)]
+    db.get_dashboard_stats()
+    return db, credit_ids
+
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_late_payment_event_after_recompute(shop, bulk):
+    db, credit_ids = shop
+
+    # Tahan event: pembayaran sudah commit, event belum diterapkan
+    held = []
+    db.events.unsubscribe(db.stats.on_event)
+    db.events.subscribe(held.append)
+    if bulk:
+        db.add_payments_bulk([(credit_ids[0], 10000), (credit_ids[1], 20000)])
+    else:
+        db.add_payment(credit_ids[0], 10000)
+
+    # Thread lain memicu hitung ulang (invalidate/DataReloaded/ganti hari)
+    expected = recomputed(db)
+
+    for event in held:
+        db.stats.on_event(event)
+    assert db.get_dashboard_stats() == expected
+    assert expected['sudah_bayar'] == (2 if bulk else 1)
+
+
+def test_late_credit_event_after_recompute(shop):
+    db, credit_ids = shop
+
+    held = []
+    db.events.unsubscribe(db.stats.on_event)
+    db.events.subscribe(held.append)
+    db.add_credit(1, 'Kulkas', 600000, 60)
+    expected = recomputed(db)
+
+    (event,) = [e for e in held if isinstance(e, CreditAdded)]
+    db.stats.on_event(event)
+    assert db.get_dashboard_stats() == expected
+
+
+def test_events_after_recompute_still_apply(shop):
+    db, credit_ids = shop
+    recomputed(db)
+
+    db.add_payment(credit_ids[0], 10000)
+    db.add_payments_bulk([(credit_ids[1], 10000, date.today() - timedelta(days=1))])
+    db.add_credit(1, 'Kulkas', 600000, 60)
+
+    live = db.get_dashboard_stats()
+    assert live == recomputed(db)
+
+
+def test_bulk_results_carry_payment_ids(shop):
+    db, credit_ids = shop
+    db.add_payment(credit_ids[2], 10000)
+    out = db.add_payments_bulk([(credit_ids[0], 10000), (999, 10000), (credit_ids[1], 30000)])
+
+    ids = [r['payment_id'] for r in out['results'] if r is not None]
+    stored = db.connections.cursor().execute(
+        'SELECT id, credit_id, amount FROM payments ORDER BY id DESC LIMIT 2'
+    ).fetchall()[::-1]
+    assert [(i, r['credit_id'], r['amount']) for i, r in
+            zip(ids, [r for r in out['results'] if r is not None])] == stored
+    assert out['results'][1] is None
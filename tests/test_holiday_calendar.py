@@ -0,0 +1,86 @@
+"""HolidayCalendar dibandingkan dengan hitung manual hari per hari pada
+kalender 10 tahun (2025-2034)"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from holiday_calendar import HolidayCalendar
+
+START = date(2025, 1, 1)
+END = date(2034, 12, 31)
+SPAN = (END - START).days + 1
+
+
+def days(start, end):
+    """Semua tanggal dalam rentang inklusif (kosong jika end < start)"""
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+@pytest.fixture(scope='module')
+def holidays():
+    # Setiap Minggu + libur acak, termasuk rentang beruntun (mis. Lebaran)
+    rnd = random.Random(12)
+    result = {d for d in days(START, END) if d.weekday() == 6 or rnd.random() < 0.04}
+    for _ in range(10):
+        first = START + timedelta(days=rnd.randrange(SPAN - 10))
+        result.update(days(first, first + timedelta(days=rnd.randrange(2, 8))))
+    return result
+
+
+@pytest.fixture(scope='module')
+def calendar(holidays):
+    # Campuran string ISO (kolom DATE) dan objek date
+    return HolidayCalendar(d.isoformat() if d.day % 2 else d for d in holidays)
+
+
+def sample_ranges(count=1500):
+    rnd = random.Random(7)
+    ranges = [(START, END), (END, START), (START, START), (END, END)]
+    for _ in range(count):
+        start = START + timedelta(days=rnd.randrange(SPAN))
+        ranges.append((start, start + timedelta(days=rnd.randrange(-5, 900))))
+    return ranges
+
+
+def test_is_holiday(calendar, holidays):
+    assert len(calendar) == len(holidays)
+    for day in days(START - timedelta(days=3), END + timedelta(days=3)):
+        expected = day in holidays
+        assert calendar.is_holiday(day) == expected
+        assert calendar.is_holiday(day.isoformat()) == expected
+        assert (day in calendar) == expected
+
+
+def test_ranges(calendar, holidays):
+    for start, end in sample_ranges():
+        walked = [d for d in days(start, end) if d in holidays]
+        assert calendar.count_between(start, end) == len(walked), (start, end)
+        assert calendar.holidays_between(start, end) == walked, (start, end)
+        assert calendar.business_days_between(start, end) == len(days(start, end)) - len(walked), (start, end)
+
+
+def test_due_date(calendar, holidays):
+    rnd = random.Random(3)
+    for _ in range(1500):
+        start = START + timedelta(days=rnd.randrange(SPAN - 400))
+        total_days = rnd.randrange(1, 200)
+
+        # Maju hari per hari: jatuh tempo = hari ke-total_days yang bukan
+        # libur; libur pada start sendiri juga menggeser satu hari
+        due = start
+        remaining = total_days + (start in holidays)
+        while remaining:
+            due += timedelta(days=1)
+            remaining -= due not in holidays
+
+        assert calendar.due_date(start, total_days) == due, (start, total_days)
+        assert calendar.due_date(start.isoformat(), total_days) == due
+
+
+def test_empty_calendar():
+    calendar = HolidayCalendar()
+    assert calendar.due_date('2025-03-01', 30) == date(2025, 3, 31)
+    assert calendar.business_days_between(START, END) == SPAN
+    assert calendar.holidays_between(START, END) == []
@@ -0,0 +1,46 @@
+"""Penandaan hari libur lewat DatabaseManager"""
+
+import threading
+from datetime import date
+
+import pytest
+
+
+def test_mark_holiday_range_accepts_iso_strings(db):
+    assert db.mark_holiday_range('2026-03-18', '2026-03-24') == 7
+    assert db.is_holiday(date(2026, 3, 20))
+    assert not db.is_holiday('2026-03-25')
+
+    # Tanggal yang sudah libur dilewati; campuran string dan date
+    assert db.mark_holiday('2026-03-25')
+    assert db.mark_holiday_range(date(2026, 3, 24), '2026-03-26') == 1
+    assert db.holiday_calendar().holidays_between('2026-03-01', '2026-03-31') == [
+        date(2026, 3, d) for d in range(18, 27)
+    ]
+
+
+def test_mark_holiday_range_rejects_reversed_range(db):
+    with pytest.raises(ValueError):
+        db.mark_holiday_range('2026-03-24', '2026-03-18')
+    assert len(db.holiday_calendar()) == 0
+
+
+def test_stale_calendar_load_is_not_cached(db, monkeypatch):
+    import database
+
+    today = date.today()
+    real_calendar = database.HolidayCalendar
+    marked = []
+
+    def slow_calendar(dates):
+        # Libur baru commit (di thread lain) setelah loader membaca tabel
+        if not marked:
+            marked.append(True)
+            writer = threading.Thread(target=db.mark_holiday, args=(today,))
+            writer.start()
+            writer.join()
+        return real_calendar(dates)
+
+    monkeypatch.setattr(database, 'HolidayCalendar', slow_calendar)
+    assert not db.is_holiday(today)  # snapshot lama, hanya untuk panggilan ini
+    assert db.is_holiday(today)
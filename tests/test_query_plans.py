@@ -0,0 +1,95 @@
+"""Regresi query plan: query utama tidak boleh kembali ke full scan
+tabel credits/payments/customers (EXPLAIN QUERY PLAN)"""
+
+import re
+from datetime import date, timedelta
+
+import pytest
+
+# Tabel yang tumbuh bersama portofolio
+LARGE_TABLES = {'credits', 'payments', 'customers', 'payment_summaries'}
+
+SQL_KEYWORDS = {
+    'on', 'where', 'left', 'inner', 'join', 'group', 'order', 'limit',
+    'using', 'as', 'set', 'union', 'natural', 'cross'
+}
+
+TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SCAN = re.compile(r'^SCAN (\w+)')
+
+
+def table_aliases(sql):
+    """Peta alias/nama -> nama tabel dari klausa FROM/JOIN"""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table.lower()] = table.lower()
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias.lower()] = table.lower()
+    return aliases
+
+
+@pytest.fixture
+def portfolio(db):
+    for i in range(20):
+        db.add_customer(f'Pelanggan {i}', f'Jalan {i}', f'0812{i:06d}')
+    for i in range(40):
+        db.add_credit(i % 20 + 1, f'Barang {i}', 300000, 30)
+    for i in range(100):
+        db.add_payment(i % 40 + 1, 10000, date.today() - timedelta(days=i % 7))
+    return db
+
+
+def traced_plans(db, call):
+    """Jalankan call() dan kembalikan (sql, baris plan) tiap statement"""
+    conn = db.connections.connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+
+    plans = []
+    for sql in statements:
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'INSERT', 'DELETE')):
+            continue
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + sql).fetchall()
+        plans.append((sql, [row[3] for row in rows]))
+    return plans
+
+
+HOT_QUERIES = {
+    'get_credits': lambda db: db.get_credits(),
+    'get_credits_customer': lambda db: db.get_credits(customer_id=3),
+    'get_today_collections': lambda db: db.get_today_collections(),
+    'get_payment_summary': lambda db: db.get_payment_summary(5),
+    'post_payment': lambda db: db.add_payment(7, 10000),
+    'get_credit': lambda db: db.get_credit(9),
+    'search_customers_name': lambda db: db.search_customers('pelangan 1'),
+    'search_customers_phone': lambda db: db.search_customers('0812'),
+}
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_has_no_full_scan(portfolio, name):
+    plans = traced_plans(portfolio, lambda: HOT_QUERIES[name](portfolio))
+    assert plans, 'tidak ada query yang tertangkap'
+
+    for sql, plan in plans:
+        aliases = table_aliases(sql)
+        for detail in plan:
+            match = SCAN.match(detail)
+            if match is None:
+                continue
+            table = aliases.get(match.group(1).lower(), match.group(1).lower())
+            assert table not in LARGE_TABLES, f'{name}: {detail}\n{sql}'
+
+
+def test_scan_is_detected(portfolio):
+    """Pemeriksa sendiri harus menangkap full scan lewat alias"""
+    plans = traced_plans(portfolio, lambda: portfolio.connections.cursor().execute(
+        'SELECT c.id FROM credits c WHERE c.item_name = ?', ('Barang 1',)
+    ).fetchall())
+    (sql, plan), = plans
+    assert any(table_aliases(sql).get(SCAN.match(d).group(1)) == 'credits'
+               for d in plan if SCAN.match(d))
@@ -0,0 +1,27 @@
+"""Struk dari hasil posting pembayaran"""
+
+from datetime import date, datetime
+
+from models import Receipt
+
+
+def test_bulk_receipts_accept_any_date_form(db):
+    customer_id = db.add_customer('Ani', 'Jalan', '0812')
+    credit_id = db.add_credit(customer_id, 'Kulkas', 300000, 30)
+
+    out = db.add_payments_bulk([
+        (credit_id, 10000, '2026-10-16'),
+        (credit_id, 10000, datetime(2026, 10, 15, 9, 30)),
+        (credit_id, 10000, date(2026, 10, 14)),
+    ])
+
+    dates = [date(2026, 10, 16), date(2026, 10, 15), date(2026, 10, 14)]
+    assert [receipt['date'] for receipt in out['receipts']] == dates
+    assert [result['payment_date'] for result in out['results']] == [d.isoformat() for d in dates]
+    for receipt in out['receipts']:
+        assert 'Kulkas' in Receipt(**receipt).get_receipt_text()
+
+    stored = db.connections.cursor().execute(
+        'SELECT payment_date FROM payments ORDER BY id').fetchall()
+    assert stored == [(d.isoformat(),) for d in dates]
+
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Widget daftar untuk Toko Kredit Syariah
+Daftar panjang memakai RecycleView: hanya baris yang terlihat yang dibuat
+dan dipakai ulang saat digulir, isinya diambil dari list dict (data model)
+"""
+
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.textinput import TextInput
+from kivy.metrics import dp
+from kivy.clock import Clock
+
+from models import format_currency
+
+PAID_COLOR = (0.2, 0.8, 0.2, 1)
+UNPAID_COLOR = (0.8, 0.2, 0.2, 1)
+REPRINT_COLOR = (0.6, 0.6, 0.6, 1)
+
+
+class CollectionRow(RecycleDataViewBehavior, BoxLayout):
+    """Satu baris tagihan; widget dibuat sekali lalu diisi ulang dari data"""
+
+    def __init__(self, **kwargs):
+        super().__init__(spacing=dp(10), padding=[dp(10), dp(5)], **kwargs)
+        self.list_view = None
+        self.credit_id = None
+        self.paid_today = False
+
+        # Status icon
+        self.status_label = Label(size_hint_x=None, width=dp(30), font_size=dp(20))
+        self.add_widget(self.status_label)
+
+        # Customer info
+        self.info_label = Label(
+            size_hint_x=0.5,
+            text_size=(dp(150), None),
+            halign='left',
+            valign='middle'
+        )
+        self.add_widget(self.info_label)
+
+        # Amount and status
+        self.amount_label = Label(
+            size_hint_x=0.3,
+            text_size=(dp(100), None),
+            halign='right',
+            valign='middle'
+        )
+        self.add_widget(self.amount_label)
+
+        # Action button
+        self.action_btn = Button(size_hint_x=0.2, on_press=self.on_action)
+        self.add_widget(self.action_btn)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Isi baris dari dict get_today_collections"""
+        self.list_view = rv
+        self.credit_id = data['credit_id']
+        self.paid_today = data['paid_today']
+
+        self.status_label.text = "✓" if self.paid_today else "!"
+        self.status_label.color = PAID_COLOR if self.paid_today else UNPAID_COLOR
+        self.info_label.text = f"{data['customer_name']}\n{data['item_name']}"
+        self.amount_label.text = (
+            f"{format_currency(data['daily_amount'])}\n"
+            f"({data['total_days_paid']}x | {data['remaining_days']}x)"
+        )
+
+        if self.paid_today:
+            self.action_btn.text = 'Cetak Ulang'
+            self.action_btn.background_color = REPRINT_COLOR
+        else:
+            self.action_btn.text = 'Bayar'
+            self.action_btn.background_color = PAID_COLOR
+
+    def on_action(self, instance):
+        if self.list_view is None:
+            return
+        if self.paid_today:
+            self.list_view.reprint_callback(self.credit_id)
+        else:
+            self.list_view.pay_callback(self.credit_id)
+
+
+class CollectionListView(RecycleView):
+    """Daftar tagihan hari ini.
+
+    Isi `data` dengan list dict get_today_collections; setelah mengubah
+    dict di tempat panggil refresh_from_data().
+    """
+
+    def __init__(self, pay_callback, reprint_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.pay_callback = pay_callback
+        self.reprint_callback = reprint_callback
+
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(5),
+            default_size=(None, dp(80)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        # viewclass diteruskan ke layout manager, jadi diisi setelah layout ada
+        self.viewclass = CollectionRow
+
+
+# Kolom tabel laporan: (key record, judul, perataan)
+REPORT_COLUMNS = [
+    ('customer_name', 'Nama', 'left'),
+    ('item_name', 'Barang', 'left'),
+    ('total_price', 'Total', 'right'),
+    ('total_amount_paid', 'Sudah', 'right'),
+    ('remaining_amount', 'Sisa', 'right')
+]
+HEADER_COLOR = (0.2, 0.6, 0.8, 1)
+
+
+class ReportRow(RecycleDataViewBehavior, BoxLayout):
+    """Satu baris tabel laporan (satu kredit aktif)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(spacing=dp(2), **kwargs)
+        self.cells = {}
+        for key, title, halign in REPORT_COLUMNS:
+            cell = Label(
+                size_hint_x=0.2,
+                text_size=(dp(60), None),
+                halign=halign,
+                valign='middle',
+                font_size=dp(11)
+            )
+            self.cells[key] = cell
+            self.add_widget(cell)
+        self.cells['total_amount_paid'].color = PAID_COLOR
+        self.cells['remaining_amount'].color = UNPAID_COLOR
+
+    def refresh_view_attrs(self, rv, index, data):
+        cells = self.cells
+        cells['customer_name'].text = data['customer_name'][:15]
+        cells['item_name'].text = data['item_name'][:15]
+        cells['total_price'].text = format_currency(data['total_price'])
+        cells['total_amount_paid'].text = format_currency(data['total_amount_paid'])
+        cells['remaining_amount'].text = format_currency(data['remaining_amount'])
+
+
+class ReportTable(BoxLayout):
+    """Tabel kredit virtual dengan kolom yang bisa diurutkan.
+
+    Data dimuat per halaman lewat fetch_page(sort_by, descending, after,
+    limit, callback) - biasanya query asinkron get_credits_sorted_page.
+    Halaman berikutnya baru dimuat saat tabel digulir mendekati bawah, dan
+    RecycleView hanya membuat widget untuk baris yang terlihat.
+    """
+
+    page_size = 50
+
+    def __init__(self, fetch_page, sort_by='id', descending=True, **kwargs):
+        super().__init__(orientation='vertical', **kwargs)
+        self.fetch_page = fetch_page
+        self.sort_by = sort_by
+        self.descending = descending
+        self._after = None
+        self._exhausted = False
+        self._loading = False
+        self._generation = 0  # naik setiap reload; halaman lama diabaikan
+
+        # Table header (tekan judul untuk mengurutkan)
+        header_layout = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(2))
+        self.header_buttons = {}
+        for key, title, halign in REPORT_COLUMNS:
+            button = Button(
+                text=title,
+                size_hint_x=0.2,
+                font_size=dp(12),
+                bold=True,
+                color=HEADER_COLOR,
+                background_color=(0, 0, 0, 0),
+                on_press=lambda x, key=key: self.sort(key)
+            )
+            self.header_buttons[key] = button
+            header_layout.add_widget(button)
+        self.add_widget(header_layout)
+
+        self.view = RecycleView()
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(2),
+            default_size=(None, dp(60)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.view.add_widget(layout)
+        self.view.viewclass = ReportRow
+        self.view.bind(scroll_y=self._on_scroll)
+        self.add_widget(self.view)
+
+        self._update_header()
+
+    def reload(self):
+        """Buang data dan muat ulang dari halaman pertama"""
+        self._generation += 1
+        self._after = None
+        self._exhausted = False
+        self._loading = False
+        self.view.data = []
+        self.view.scroll_y = 1
+        self.load_more()
+
+    def sort(self, key):
+        """Urutkan berdasarkan kolom; tekan lagi untuk membalik arah"""
+        if key == self.sort_by:
+            self.descending = not self.descending
+        else:
+            self.sort_by = key
+            self.descending = False
+        self._update_header()
+        self.reload()
+
+    def load_more(self):
+        if self._loading or self._exhausted:
+            return
+        self._loading = True
+        generation = self._generation
+        self.fetch_page(
+            self.sort_by, self.descending, self._after, self.page_size,
+            lambda page: self._on_page(generation, page)
+        )
+
+    def _on_page(self, generation, page):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+
+        self._after = (page[-1][self.sort_by], page[-1]['id'])
+        # dict biasa: RecycleView membaca key ukuran (size, height, ...) dari
+        # setiap item, yang pada LazyRecord akan memicu dekripsi
+        self.view.data.extend(
+            {key: record[key] for key in ('id',) + tuple(c[0] for c in REPORT_COLUMNS)}
+            for record in page
+        )
+
+    def _on_scroll(self, view, scroll_y):
+        # Muat halaman berikutnya jika sisa di bawah viewport < satu layar
+        hidden = max(0, view.children[0].height - view.height) if view.children else 0
+        if scroll_y * hidden < view.height:
+            self.load_more()
+
+    def _update_header(self):
+        for key, title, halign in REPORT_COLUMNS:
+            arrow = ''
+            if key == self.sort_by:
+                arrow = ' ▼' if self.descending else ' ▲'
+            self.header_buttons[key].text = title + arrow
+
+
+# Pencarian: jeda ketik sebelum query dan jumlah hasil teratas
+SEARCH_DELAY = 0.25
+SEARCH_LIMIT = 20
+SELECTED_COLOR = (0.2, 0.6, 0.8, 1)
+RESULT_COLOR = (0.3, 0.3, 0.3, 1)
+
+
+class SearchResultRow(RecycleDataViewBehavior, Button):
+    """Satu hasil pencarian SearchPicker"""
+
+    def __init__(self, **kwargs):
+        super().__init__(halign='left', valign='middle', **kwargs)
+        self.bind(size=lambda button, size: setattr(button, 'text_size', size))
+        self.list_view = None
+        self.item_id = None
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.list_view = rv
+        self.item_id = data['item_id']
+        self.text = data['text']
+        self.background_color = SELECTED_COLOR if data['selected'] else RESULT_COLOR
+
+    def on_press(self):
+        if self.list_view is not None:
+            self.list_view.select_callback(self.item_id)
+
+
+class SearchPicker(BoxLayout):
+    """Pilih record dengan mengetik (pengganti Spinner berisi semua record).
+
+    Setiap ketikan menjadwalkan ulang pencarian; query baru dijalankan
+    SEARCH_DELAY detik setelah ketikan terakhir lewat
+    search(query, limit, callback) - biasanya query asinkron terindeks.
+    Hanya SEARCH_LIMIT hasil teratas yang dimuat dan ditampilkan.
+    Subclass mengisi describe(record) untuk teks baris.
+    """
+
+    hint_text = 'Cari...'
+
+    def __init__(self, search, select_callback=None, **kwargs):
+        super().__init__(orientation='vertical', spacing=dp(5), **kwargs)
+        self.search = search
+        self.select_callback = select_callback
+        self.selected = None
+        self.items = {}    # id -> record hasil pencarian terakhir
+        self._request = 0  # nomor pencarian terakhir; hasil lama diabaikan
+
+        self.search_input = TextInput(
+            hint_text=self.hint_text,
+            multiline=False,
+            size_hint_y=None,
+            height=dp(50),
+            font_size=dp(16)
+        )
+        self.search_input.bind(text=self._on_text)
+        self.add_widget(self.search_input)
+
+        self.results = RecycleView()
+        self.results.select_callback = self.select_id
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(2),
+            default_size=(None, dp(40)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.results.add_widget(layout)
+        self.results.viewclass = SearchResultRow
+        self.add_widget(self.results)
+
+        self._search_event = Clock.create_trigger(self.refresh, SEARCH_DELAY)
+
+    def describe(self, record):
+        raise NotImplementedError
+
+    def _on_text(self, instance, text):
+        # Debounce: batalkan jadwal sebelumnya, mulai hitung ulang jeda
+        self._search_event.cancel()
+        self._search_event()
+
+    def refresh(self, dt=None):
+        """Jalankan pencarian untuk teks saat ini"""
+        self._request += 1
+        request = self._request
+        self.search(
+            self.search_input.text.strip(), SEARCH_LIMIT,
+            lambda records: self._on_results(request, records)
+        )
+
+    def _on_results(self, request, records):
+        if request != self._request:
+            return
+        self.items = {record['id']: record for record in records}
+        self._render(records)
+
+    def _render(self, records):
+        selected_id = self.selected['id'] if self.selected else None
+        # dict biasa agar RecycleView tidak memicu dekripsi LazyRecord
+        self.results.data = [{
+            'item_id': record['id'],
+            'text': self.describe(record),
+            'selected': record['id'] == selected_id
+        } for record in records]
+
+    def select_id(self, item_id):
+        """Pilih hasil yang sedang tampil berdasarkan id (O(1))"""
+        record = self.items.get(item_id)
+        if record is not None:
+            self.select(record)
+
+    def select(self, record, search_text=None):
+        """Pilih record; `search_text` mengganti teks pencarian (mis. saat
+        record dipilih dari layar lain) sehingga hasilnya ikut tampil"""
+        self.selected = record
+        if search_text is not None and search_text != self.search_input.text:
+            self.items[record['id']] = record
+            self.search_input.text = search_text
+        self._render(list(self.items.values()))
+        if self.select_callback is not None:
+            self.select_callback(record)
+
+    def update_item(self, record):
+        """Perbarui satu record yang sedang tampil (mis. dari event)"""
+        if record['id'] in self.items:
+            self.items[record['id']] = record
+            self._render(list(self.items.values()))
+
+    def remove_item(self, item_id):
+        if self.items.pop(item_id, None) is not None:
+            self._render(list(self.items.values()))
+
+    def clear(self):
+        """Kosongkan pilihan dan teks pencarian"""
+        self.selected = None
+        self.search_input.text = ''
+        self._search_event.cancel()
+        self.refresh()
+
+
+class CustomerPicker(SearchPicker):
+    """Pilih pelanggan dengan mengetik nama atau no. HP"""
+
+    hint_text = 'Cari nama atau no. HP...'
+
+    def describe(self, customer):
+        return f"{customer['name']} - {customer['phone']}" if customer['phone'] else customer['name']
+
+
+class CreditPicker(SearchPicker):
+    """Pilih kredit aktif dengan mengetik nama pelanggan atau barang"""
+
+    hint_text = 'Cari pelanggan atau barang...'
+
+    def describe(self, credit):
+        return f"{credit['customer_name']} - {credit['item_name']} (Sisa: {credit['remaining_days']} hari)"